@@ -0,0 +1,295 @@
+import asyncio
+import json
+import os
+import time
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.http import parse_cookie
+
+from app import (
+    app, db, Estudiante, tabla_ranking, registro_metricas, metricas_pool, db_url,
+    consulta_ranking, cargar_tabla_ranking, consulta_misiones_con_progreso, misiones_con_progreso, clasificar_resultados,
+    broker_eventos, canal_estudiante, estado_nivel, formato_sse,
+    RANKING_TAMANO_PAGINA, RANKING_LIMITE_API, RANKING_TTL_SEGUNDOS, MAX_RESULTADOS_POR_LOTE,
+    EVENTOS_COLA_MAX, EVENTOS_REINTENTO_MS,
+)
+from base_datos import url_asincrona, opciones_motor_asincrono, MetricasPool
+
+# Modo de despliegue ASGI (opcional):
+#
+#     uvicorn asgi:aplicacion --workers 4
+#     gunicorn -k uvicorn.workers.UvicornWorker asgi:aplicacion
+#
+# Las peticiones JSON pequeñas y frecuentes se atienden en el bucle de eventos:
+#   GET /api/ranking y /api/misiones se resuelven con corrutinas sobre un motor
+#   SQLAlchemy asíncrono (asyncpg / aiomysql / aiosqlite), así que mientras
+#   esperan a la base de datos no ocupan ningún hilo.
+#   POST /juego/resultado y /juego/resultados se leen y validan aquí; las
+#   escrituras pasan por el motor de gamificación de siempre (que usa la sesión
+#   de Flask y flash), pero el hilo solo se ocupa durante la transacción, no
+#   mientras el cliente sube el cuerpo.
+#   GET /eventos (server-sent events) se mantiene abierto sin ocupar un hilo ni
+#   una conexión a la base de datos.
+# Todo lo demás (páginas, formularios, estáticos) es la app Flask sin cambios,
+# en un pool de ASGI_HILOS hilos. Si un atajo no puede responder (sin sesión,
+# estudiante borrado...) también delega en Flask, que responde como siempre.
+
+with app.app_context():
+    # La URL ya resuelta por Flask-SQLAlchemy (rutas de SQLite relativas a instance/).
+    app.config['DATABASE_ASYNC_URL'] = os.environ.get('DATABASE_ASYNC_URL') or url_asincrona(db.engine.url)
+app.config['ASGI_HILOS'] = int(os.environ.get('ASGI_HILOS', 10))
+# Aquí /eventos no ocupa un hilo: los eventos en vivo quedan activos salvo EVENTOS_SSE=0.
+app.config['EVENTOS_SSE'] = os.environ.get('EVENTOS_SSE') != '0'
+app.config['ASGI_MAX_CUERPO'] = int(os.environ.get('ASGI_MAX_CUERPO', 256 * 1024))
+
+flask_asgi = WSGIMiddleware(app, workers=app.config['ASGI_HILOS'])
+motor = create_async_engine(app.config['DATABASE_ASYNC_URL'], **opciones_motor_asincrono(db_url, os.environ))
+metricas_pool['asincrono'] = MetricasPool(motor.sync_engine)
+recarga_ranking = asyncio.Lock()
+
+class CuerpoDemasiadoGrande(Exception):
+    pass
+
+class Peticion:
+    def __init__(self, scope, cuerpo=b''):
+        self.scope = scope
+        self.cuerpo = cuerpo
+        self.args = {clave: valores[0] for clave, valores in parse_qs(scope['query_string'].decode('latin-1')).items()}
+        self.cabeceras = {nombre.decode('latin-1').lower(): valor.decode('latin-1') for nombre, valor in scope['headers']}
+        self.estudiante_id = self._estudiante_de_sesion()
+        self.consultas = 0
+        self.segundos_db = 0.0
+
+    def _estudiante_de_sesion(self):
+        """estudiante_id de la cookie de sesión de Flask (firmada), o None."""
+        valor = parse_cookie(self.cabeceras.get('cookie', '')).get(app.config['SESSION_COOKIE_NAME'])
+        if not valor:
+            return None
+        serializador = app.session_interface.get_signing_serializer(app)
+        try:
+            datos = serializador.loads(valor, max_age=int(app.permanent_session_lifetime.total_seconds()))
+        except BadSignature:
+            return None
+        return datos.get('estudiante_id')
+
+    def json(self):
+        """Como request.get_json(silent=True)."""
+        if not self.cabeceras.get('content-type', '').startswith('application/json'):
+            return None
+        try:
+            return json.loads(self.cuerpo)
+        except ValueError:
+            return None
+
+    async def filas(self, sentencia):
+        inicio = time.perf_counter()
+        async with motor.connect() as conexion:
+            resultado = (await conexion.execute(sentencia)).all()
+        self.consultas += 1
+        self.segundos_db += time.perf_counter() - inicio
+        return resultado
+
+    async def estudiante_existe(self):
+        if self.estudiante_id is None:
+            return False
+        return bool(await self.filas(db.select(Estudiante.id).where(Estudiante.id == self.estudiante_id)))
+
+def entero(valor, defecto):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return defecto
+
+# --- RUTAS ASÍNCRONAS ---
+# Cada una devuelve (estado, datos) o None para delegar la petición en Flask.
+
+async def api_ranking(peticion):
+    if not await peticion.estudiante_existe():
+        return None
+    limite = min(max(entero(peticion.args.get('limite'), RANKING_TAMANO_PAGINA), 1), RANKING_LIMITE_API)
+    cursor = peticion.args.get('despues')
+    if cursor:
+        try:
+            puntos, xp, estudiante_id = (int(valor) for valor in cursor.split('.'))
+            cursor = (puntos, xp, estudiante_id)
+        except ValueError:
+            return 400, {"status": "error", "message": "Cursor inválido."}
+
+    # La tabla en memoria es la misma que usan los hilos de Flask.
+    if tabla_ranking.expirada(RANKING_TTL_SEGUNDOS):
+        async with recarga_ranking:
+            if tabla_ranking.expirada(RANKING_TTL_SEGUNDOS):
+                cargar_tabla_ranking(await peticion.filas(consulta_ranking()))
+
+    filas = tabla_ranking.despues_de(cursor or None, limite)
+    siguiente = None
+    if len(filas) == limite:
+        ultima = filas[-1]
+        siguiente = f"{ultima['puntos']}.{ultima['xp']}.{ultima['id']}"
+    return 200, {
+        "status": "ok",
+        "ranking": filas,
+        "siguiente": siguiente,
+        "mi_posicion": tabla_ranking.posicion(peticion.estudiante_id),
+        "total": tabla_ranking.total()
+    }
+
+async def api_misiones(peticion):
+    if not await peticion.estudiante_existe():
+        return None
+    filas = await peticion.filas(consulta_misiones_con_progreso(peticion.estudiante_id))
+    return 200, {"status": "ok", "misiones": misiones_con_progreso(filas)}
+
+async def juego_resultados(peticion):
+    if peticion.estudiante_id is None:
+        return None
+    data = peticion.json() or {}
+    resultados = data.get('resultados') if isinstance(data, dict) else None
+    if not isinstance(resultados, list) or not resultados:
+        return 400, {"status": "error", "message": "Se esperaba una lista 'resultados'."}
+    if len(resultados) > MAX_RESULTADOS_POR_LOTE:
+        return 413, {"status": "error", "message": f"Máximo {MAX_RESULTADOS_POR_LOTE} resultados por lote."}
+    return None
+
+async def juego_resultado(peticion):
+    if peticion.estudiante_id is None:
+        return None
+    data = peticion.json() or {}
+    # La clave no influye en la validación; cualquier valor no vacío sirve aquí.
+    if not isinstance(data, dict) or clasificar_resultados([dict(data, clave=data.get('clave') or '-')])[1]:
+        return 400, {"status": "error", "message": "Datos incompletos para procesar el resultado del juego."}
+    return None
+
+async def flujo_eventos(peticion, receive, send):
+    """Como eventos_estudiante() de app.py, sin límite de duración. False para delegar en Flask."""
+    if peticion.estudiante_id is None:
+        return False
+    filas = await peticion.filas(db.select(Estudiante.puntos, Estudiante.xp, Estudiante.nivel).where(
+        Estudiante.id == peticion.estudiante_id
+    ))
+    if not filas:
+        return False
+
+    bucle = asyncio.get_running_loop()
+    cola = asyncio.Queue(maxsize=EVENTOS_COLA_MAX)
+    def meter(mensaje):
+        if not cola.full():
+            cola.put_nowait(mensaje)
+    # El broker llama desde el hilo que confirmó la transacción.
+    cancelar = broker_eventos.suscribir(canal_estudiante(peticion.estudiante_id),
+                                        lambda mensaje: bucle.call_soon_threadsafe(meter, mensaje))
+    desconexion = asyncio.ensure_future(esperar_desconexion(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        inicial = f"retry: {EVENTOS_REINTENTO_MS}\n\n" + formato_sse('billetera', estado_nivel(filas[0]))
+        await send({'type': 'http.response.body', 'body': inicial.encode('utf-8'), 'more_body': True})
+        while not desconexion.done():
+            siguiente = asyncio.ensure_future(cola.get())
+            await asyncio.wait({siguiente, desconexion}, timeout=app.config['EVENTOS_LATIDO'],
+                               return_when=asyncio.FIRST_COMPLETED)
+            if siguiente.done():
+                mensaje = siguiente.result()
+            else:
+                siguiente.cancel()
+                mensaje = ": latido\n\n"
+            if not desconexion.done():
+                await send({'type': 'http.response.body', 'body': mensaje.encode('utf-8'), 'more_body': True})
+    finally:
+        cancelar()
+        desconexion.cancel()
+    return True
+
+async def esperar_desconexion(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+RUTAS = {
+    ('GET', '/api/ranking'): (api_ranking, 'api_ranking'),
+    ('GET', '/api/misiones'): (api_misiones, 'api_misiones'),
+    ('POST', '/juego/resultados'): (juego_resultados, 'juego_resultados'),
+    ('POST', '/juego/resultado'): (juego_resultado, 'juego_resultado'),
+}
+
+# --- APLICACIÓN ASGI ---
+
+async def leer_cuerpo(receive, limite):
+    partes, total = [], 0
+    while True:
+        mensaje = await receive()
+        if mensaje['type'] == 'http.disconnect':
+            raise ConnectionResetError
+        total += len(mensaje.get('body', b''))
+        if total > limite:
+            raise CuerpoDemasiadoGrande
+        partes.append(mensaje.get('body', b''))
+        if not mensaje.get('more_body'):
+            return b''.join(partes)
+
+def repetir_cuerpo(cuerpo, receive):
+    """receive() que entrega primero el cuerpo ya leído (para delegar en Flask)."""
+    pendiente = [{'type': 'http.request', 'body': cuerpo, 'more_body': False}]
+
+    async def recibir():
+        if pendiente:
+            return pendiente.pop()
+        return await receive()
+    return recibir
+
+async def responder(send, estado, datos):
+    # Mismo formato que jsonify.
+    cuerpo = f"{app.json.dumps(datos)}\n".encode('utf-8')
+    await send({'type': 'http.response.start', 'status': estado, 'headers': [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(cuerpo)).encode()),
+    ]})
+    await send({'type': 'http.response.body', 'body': cuerpo})
+
+async def vida(receive, send):
+    while True:
+        mensaje = await receive()
+        if mensaje['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif mensaje['type'] == 'lifespan.shutdown':
+            await motor.dispose()
+            flask_asgi.executor.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def aplicacion(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await vida(receive, send)
+    if scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] == '/eventos' and app.config['EVENTOS_SSE']:
+        if not await flujo_eventos(Peticion(scope), receive, send):
+            await flask_asgi(scope, receive, send)
+        return
+    ruta = RUTAS.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+    if ruta is None:
+        return await flask_asgi(scope, receive, send)
+
+    manejador, endpoint = ruta
+    inicio = time.perf_counter()
+    cuerpo = b''
+    if scope['method'] == 'POST':
+        try:
+            cuerpo = await leer_cuerpo(receive, app.config['ASGI_MAX_CUERPO'])
+        except ConnectionResetError:
+            return
+        except CuerpoDemasiadoGrande:
+            return await responder(send, 413, {"status": "error", "message": "Petición demasiado grande."})
+
+    peticion = Peticion(scope, cuerpo)
+    respuesta = await manejador(peticion)
+    if respuesta is None:
+        return await flask_asgi(scope, repetir_cuerpo(cuerpo, receive), send)
+
+    estado, datos = respuesta
+    await responder(send, estado, datos)
+    registro_metricas.registrar(f"asgi.{endpoint}", scope['method'], estado, peticion.consultas,
+                                peticion.segundos_db, 0.0, time.perf_counter() - inicio)
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TimeoutFuturo
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Autenticación: hash de contraseñas con coste configurable y limitación de
+# intentos por IP y por email.
+#
+# El KDF es lento a propósito. Para que una ráfaga de logins no ocupe todos los
+# hilos del worker, el hash puede ejecutarse en un pool acotado: como mucho
+# `hilos` cálculos a la vez y `max_pendientes` en cola; el resto se rechaza al
+# momento con ServidorOcupado en vez de esperar. hashlib.scrypt y pbkdf2_hmac
+# liberan el GIL, así que un pool de hilos basta.
+
+
+class ServidorOcupado(Exception):
+    pass
+
+
+class Hasher:
+    def __init__(self, metodo='scrypt:32768:8:1', hilos=0, max_pendientes=None, timeout=10):
+        self.metodo = metodo
+        # Hash de referencia: da el prefijo normalizado del método ("scrypt:32768:8:1")
+        # y se usa para gastar el mismo tiempo cuando el email no existe.
+        self._hash_falso = generate_password_hash('', metodo)
+        self.prefijo = self._hash_falso.split('$', 1)[0]
+        self.timeout = timeout
+        self._ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='kdf') if hilos else None
+        self._cupos = threading.BoundedSemaphore(max_pendientes or hilos * 4) if hilos else None
+
+    def _ejecutar(self, funcion, *args):
+        if self._ejecutor is None:
+            return funcion(*args)
+        if not self._cupos.acquire(blocking=False):
+            raise ServidorOcupado()
+        try:
+            futuro = self._ejecutor.submit(funcion, *args)
+        except BaseException:
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(lambda _: self._cupos.release())
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TimeoutFuturo:
+            raise ServidorOcupado() from None
+
+    def generar(self, password):
+        return self._ejecutar(generate_password_hash, password, self.metodo)
+
+    def verificar(self, password_hash, password):
+        """Compara la contraseña; con password_hash=None gasta el mismo tiempo y devuelve False."""
+        if password_hash is None:
+            self._ejecutar(check_password_hash, self._hash_falso, password)
+            return False
+        return self._ejecutar(check_password_hash, password_hash, password)
+
+    def necesita_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.prefijo
+
+
+class AlmacenMemoria:
+    """Cubos de tokens en memoria del proceso. Segura entre hilos."""
+
+    def __init__(self, max_claves=100000):
+        self.max_claves = max_claves
+        self._cubos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, clave, capacidad, recarga, ahora):
+        with self._lock:
+            tokens, ultimo = self._cubos.pop(clave, (capacidad, ahora))
+            tokens = min(capacidad, tokens + (ahora - ultimo) * recarga)
+            permitido = tokens >= 1
+            if permitido:
+                tokens -= 1
+            self._cubos[clave] = (tokens, ahora)
+            while len(self._cubos) > self.max_claves:
+                self._cubos.popitem(last=False)
+            return permitido, 0.0 if permitido else (1 - tokens) / recarga
+
+    def reiniciar(self, clave):
+        with self._lock:
+            self._cubos.pop(clave, None)
+
+
+class AlmacenRedis:
+    """Cubos compartidos entre workers; la recarga y el consumo son atómicos (Lua)."""
+
+    SCRIPT = """
+    local datos = redis.call('HMGET', KEYS[1], 'tokens', 'ultimo')
+    local capacidad, recarga, ahora = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local tokens = tonumber(datos[1]) or capacidad
+    local ultimo = tonumber(datos[2]) or ahora
+    tokens = math.min(capacidad, tokens + (ahora - ultimo) * recarga)
+    local permitido = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        permitido = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ultimo', tostring(ahora))
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacidad / recarga) + 1)
+    return {permitido, tostring(tokens)}
+    """
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("AUTH_LIMITE_URL requiere el paquete 'redis' (pip install redis).") from e
+        self._cliente = redis.Redis.from_url(url)
+        self._script = self._cliente.register_script(self.SCRIPT)
+
+    def consumir(self, clave, capacidad, recarga, ahora):
+        permitido, tokens = self._script(keys=[f"limite:{clave}"], args=[capacidad, recarga, ahora])
+        return bool(permitido), 0.0 if permitido else (1 - float(tokens)) / recarga
+
+    def reiniciar(self, clave):
+        self._cliente.delete(f"limite:{clave}")
+
+
+def crear_almacen(url):
+    if not url or url == 'memory://':
+        return AlmacenMemoria()
+    return AlmacenRedis(url)
+
+
+class LimitadorIntentos:
+    """Cubo de tokens: `capacidad` intentos seguidos, recargados en `ventana` segundos."""
+
+    def __init__(self, almacen, capacidad, ventana):
+        self.almacen = almacen
+        self.capacidad = capacidad
+        self.recarga = capacidad / ventana
+
+    def consumir(self, clave):
+        """Devuelve (permitido, segundos hasta el siguiente intento)."""
+        return self.almacen.consumir(clave, self.capacidad, self.recarga, time.time())
+
+    def reiniciar(self, clave):
+        self.almacen.reiniciar(clave)
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import tempfile
+import time
+
+from PIL import Image, ImageOps
+
+# Avatares subidos por los estudiantes. La subida se copia por bloques a un
+# archivo temporal (calculando el hash mientras tanto), se valida sin
+# decodificar la imagen completa y el recorte/redimensionado se hace en un
+# pool de procesos. El resultado se guarda por el hash del archivo original:
+# dos subidas idénticas comparten los mismos archivos y no se procesan dos veces.
+
+TAMANOS = (120, 240)  # tamaño en pantalla y pantallas 2x
+FORMATOS_PERMITIDOS = {'PNG', 'JPEG', 'GIF', 'WEBP'}
+MAX_LADO = 6000
+CALIDAD_WEBP = 82
+PREFIJO = 'subidos/'
+
+
+class AvatarInvalido(ValueError):
+    pass
+
+
+def nombre_avatar(huella):
+    """Valor de avatar_personal para un avatar subido (relativo a img/avatares)."""
+    return f"{PREFIJO}{huella}.webp"
+
+
+def ruta_variante(carpeta, huella, ancho):
+    return os.path.join(carpeta, f"{huella}-{ancho}.webp")
+
+
+def variante(nombre, ancho=None):
+    """Nombre del archivo de `nombre` más pequeño que cubra `ancho`."""
+    huella = nombre[len(PREFIJO):].rsplit('.', 1)[0]
+    elegido = next((t for t in TAMANOS if ancho is not None and t >= ancho), TAMANOS[-1])
+    return f"{PREFIJO}{huella}-{elegido}.webp"
+
+
+def guardar_temporal(stream, carpeta_temporal, max_bytes, bloque=1 << 16):
+    """Copia la subida a un archivo temporal. Devuelve (ruta, sha256)."""
+    os.makedirs(carpeta_temporal, exist_ok=True)
+    h = hashlib.sha256()
+    total = 0
+    descriptor, ruta = tempfile.mkstemp(dir=carpeta_temporal, suffix='.subida')
+    try:
+        with os.fdopen(descriptor, 'wb') as destino:
+            for trozo in iter(lambda: stream.read(bloque), b''):
+                total += len(trozo)
+                if total > max_bytes:
+                    raise AvatarInvalido(f"El archivo supera el máximo de {max_bytes // (1024 * 1024)} MB.")
+                h.update(trozo)
+                destino.write(trozo)
+    except BaseException:
+        os.remove(ruta)
+        raise
+    if total == 0:
+        os.remove(ruta)
+        raise AvatarInvalido("El archivo está vacío.")
+    return ruta, h.hexdigest()
+
+
+def validar(ruta):
+    """Comprueba formato y dimensiones leyendo solo la cabecera de la imagen."""
+    try:
+        with Image.open(ruta) as imagen:
+            formato, (ancho, alto) = imagen.format, imagen.size
+            imagen.verify()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise AvatarInvalido("El archivo no es una imagen válida.") from e
+    if formato not in FORMATOS_PERMITIDOS:
+        raise AvatarInvalido(f"Formato de imagen no permitido ({formato}).")
+    if ancho > MAX_LADO or alto > MAX_LADO:
+        raise AvatarInvalido(f"La imagen es demasiado grande (máximo {MAX_LADO}x{MAX_LADO}).")
+
+
+def procesar(ruta, carpeta, huella):
+    """Recorta al centro en cuadrado y escribe una variante WebP por tamaño.
+
+    Se ejecuta en un proceso del pool; cada variante se escribe en un temporal
+    y se renombra para que nunca se sirva un archivo a medio escribir.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    with Image.open(ruta) as imagen:
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen = imagen.convert('RGBA' if imagen.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        lado = min(imagen.size)
+        for ancho in TAMANOS:
+            destino = ruta_variante(carpeta, huella, ancho)
+            if os.path.exists(destino):
+                continue
+            recorte = ImageOps.fit(imagen, (min(ancho, lado), min(ancho, lado)), Image.LANCZOS)
+            temporal = f"{destino}.{os.getpid()}.tmp"
+            recorte.save(temporal, 'WEBP', quality=CALIDAD_WEBP, method=6)
+            os.replace(temporal, destino)
+    return nombre_avatar(huella)
+
+
+def reutilizar(carpeta, huella):
+    """True si ya hay variantes para `huella`; las marca como recientes para la limpieza."""
+    rutas = [ruta_variante(carpeta, huella, ancho) for ancho in TAMANOS]
+    try:
+        for ruta in rutas:
+            os.utime(ruta)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def limpiar_huerfanos(carpeta, carpeta_legado, en_uso, antiguedad_minima=3600):
+    """Borra avatares subidos que ningún estudiante usa.
+
+    `en_uso` es el conjunto de valores de avatar_personal. Solo se borran
+    archivos con más de `antiguedad_minima` segundos, para no pisar una subida
+    que aún no se ha confirmado en la base de datos. También se eliminan las
+    copias del formato anterior (user_<id>_<archivo>) que ya no se usan.
+    """
+    limite = time.time() - antiguedad_minima
+    usados = {variante(nombre, ancho) for nombre in en_uso if nombre.startswith(PREFIJO) for ancho in TAMANOS}
+    candidatos = []
+    if os.path.isdir(carpeta):
+        candidatos += [(os.path.join(carpeta, n), PREFIJO + n) for n in os.listdir(carpeta)]
+    if os.path.isdir(carpeta_legado):
+        candidatos += [(os.path.join(carpeta_legado, n), n) for n in os.listdir(carpeta_legado) if n.startswith('user_')]
+
+    borrados = 0
+    for ruta, nombre in candidatos:
+        if nombre in usados or nombre in en_uso or not os.path.isfile(ruta):
+            continue
+        if os.path.getmtime(ruta) < limite:
+            os.remove(ruta)
+            borrados += 1
+    return borrados
+
+
+def vaciar_temporales(carpeta_temporal, antiguedad_minima=3600):
+    if os.path.isdir(carpeta_temporal):
+        limite = time.time() - antiguedad_minima
+        for nombre in os.listdir(carpeta_temporal):
+            ruta = os.path.join(carpeta_temporal, nombre)
+            if os.path.isfile(ruta) and os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
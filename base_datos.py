@@ -0,0 +1,152 @@
+import threading
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+# Configuración de los motores de SQLAlchemy a partir de variables de entorno,
+# enrutado de lecturas a una réplica y métricas de uso del pool.
+
+
+def _entero(entorno, nombre, defecto):
+    valor = entorno.get(nombre)
+    return int(valor) if valor not in (None, '') else defecto
+
+
+def _booleano(entorno, nombre, defecto):
+    valor = entorno.get(nombre)
+    if valor in (None, ''):
+        return defecto
+    return valor.strip().lower() in ('1', 'true', 'si', 'sí', 'yes', 'on')
+
+
+def opciones_motor(url, entorno):
+    """SQLALCHEMY_ENGINE_OPTIONS para `url` según DB_* del entorno.
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (s), DB_POOL_RECYCLE (s),
+    DB_POOL_PRE_PING, DB_CONNECT_TIMEOUT (s) y DB_STATEMENT_TIMEOUT_MS. Los
+    tamaños de pool y los timeouts de conexión solo se aplican a PostgreSQL y
+    MySQL; SQLite usa su pool por defecto.
+    """
+    opciones = {
+        'pool_pre_ping': _booleano(entorno, 'DB_POOL_PRE_PING', True),
+        'pool_recycle': _entero(entorno, 'DB_POOL_RECYCLE', 1800),
+    }
+    if url.startswith('sqlite'):
+        return opciones
+
+    opciones.update(
+        pool_size=_entero(entorno, 'DB_POOL_SIZE', 5),
+        max_overflow=_entero(entorno, 'DB_MAX_OVERFLOW', 10),
+        pool_timeout=_entero(entorno, 'DB_POOL_TIMEOUT', 30),
+    )
+    connect_args = {}
+    connect_timeout = _entero(entorno, 'DB_CONNECT_TIMEOUT', 10)
+    statement_timeout = _entero(entorno, 'DB_STATEMENT_TIMEOUT_MS', 0)
+    if url.startswith('postgresql'):
+        connect_args['connect_timeout'] = connect_timeout
+        if statement_timeout:
+            connect_args['options'] = f"-c statement_timeout={statement_timeout}"
+    elif url.startswith('mysql'):
+        connect_args['connect_timeout'] = connect_timeout
+        if statement_timeout:
+            connect_args['init_command'] = f"SET SESSION max_execution_time={statement_timeout}"
+    if connect_args:
+        opciones['connect_args'] = connect_args
+    return opciones
+
+
+# Driver asíncrono equivalente a cada backend, para el modo ASGI (asgi.py).
+DRIVERS_ASINCRONOS = {
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def url_asincrona(url):
+    """La misma base de datos que `url` con su driver asíncrono."""
+    url = make_url(url)
+    return url.set(drivername=DRIVERS_ASINCRONOS.get(url.get_backend_name(), url.drivername))
+
+
+def opciones_motor_asincrono(url, entorno):
+    """Como opciones_motor(), con los connect_args que entiende cada driver asíncrono.
+
+    aiomysql acepta los mismos que pymysql; asyncpg usa `timeout` y
+    `server_settings` en lugar de `connect_timeout` y `options`.
+    """
+    opciones = opciones_motor(url, entorno)
+    if url.startswith('postgresql') and 'connect_args' in opciones:
+        connect_args = {'timeout': opciones['connect_args']['connect_timeout']}
+        statement_timeout = _entero(entorno, 'DB_STATEMENT_TIMEOUT_MS', 0)
+        if statement_timeout:
+            connect_args['server_settings'] = {'statement_timeout': str(statement_timeout)}
+        opciones['connect_args'] = connect_args
+    return opciones
+
+
+class SesionEnrutada(Session):
+    """Sesión que manda las lecturas a la réplica cuando g.usar_replica está activo.
+
+    Las escrituras (flush, INSERT/UPDATE/DELETE explícitos) siempre van al
+    motor principal.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, UpdateBase)
+                and has_app_context() and g.get('usar_replica')):
+            replica = self._db.engines.get('replica')
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class MetricasPool:
+    """Contadores de uso de conexiones de un motor (a partir de eventos del pool)."""
+
+    def __init__(self, motor):
+        self.motor = motor
+        self.conexiones_nuevas = 0
+        self.checkouts = 0
+        self.invalidadas = 0
+        self.max_en_uso = 0
+        self._en_uso = 0
+        self._lock = threading.Lock()
+        event.listen(motor, 'connect', self._al_conectar)
+        event.listen(motor, 'checkout', self._al_tomar)
+        event.listen(motor, 'checkin', self._al_devolver)
+        event.listen(motor, 'invalidate', self._al_invalidar)
+
+    def _al_conectar(self, *args):
+        with self._lock:
+            self.conexiones_nuevas += 1
+
+    def _al_tomar(self, *args):
+        with self._lock:
+            self.checkouts += 1
+            self._en_uso += 1
+            self.max_en_uso = max(self.max_en_uso, self._en_uso)
+
+    def _al_devolver(self, *args):
+        with self._lock:
+            self._en_uso = max(0, self._en_uso - 1)
+
+    def _al_invalidar(self, *args):
+        with self._lock:
+            self.invalidadas += 1
+
+    def resumen(self):
+        pool = self.motor.pool
+        datos = {
+            'en_uso': self._en_uso,
+            'max_en_uso': self.max_en_uso,
+            'checkouts': self.checkouts,
+            'conexiones_nuevas': self.conexiones_nuevas,
+            'invalidadas': self.invalidadas,
+        }
+        if hasattr(pool, 'size') and hasattr(pool, 'overflow'):
+            datos.update(tamano=pool.size(), desbordamiento=max(0, pool.overflow()), disponibles=pool.checkedin())
+        return datos
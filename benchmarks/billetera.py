@@ -0,0 +1,118 @@
+"""Prueba de estrés de la billetera con hilos concurrentes sobre SQLite.
+
+Lanza muchos hilos que compran, debitan y acreditan sobre el mismo estudiante
+y verifica que no se pierdan actualizaciones ni se gaste más de lo que hay.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.billetera [hilos] [operaciones_por_hilo]
+"""
+import os
+import sys
+import tempfile
+import threading
+
+_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{_db.name}')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import IntegrityError, OperationalError  # noqa: E402
+
+import app as aplicacion  # noqa: E402
+from app import app, db, Estudiante, Inventario  # noqa: E402
+
+SALDO_INICIAL = 1000
+PRECIO = 7
+
+
+def en_hilos(hilos, objetivo):
+    barrera = threading.Barrier(hilos)
+    errores = []
+
+    def ejecutar(i):
+        barrera.wait()
+        try:
+            objetivo(i)
+        except Exception as e:  # se reporta al final
+            errores.append(e)
+
+    trabajadores = [threading.Thread(target=ejecutar, args=(i,)) for i in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    if errores:
+        raise errores[0]
+
+
+def con_reintentos(funcion):
+    # SQLite serializa escritores; "database is locked" solo significa reintentar.
+    for _ in range(50):
+        try:
+            return funcion()
+        except OperationalError:
+            db.session.rollback()
+    raise RuntimeError("SQLite siguió bloqueado tras 50 reintentos")
+
+
+def main():
+    hilos = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    operaciones = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+
+    with app.app_context():
+        db.create_all()
+        aplicacion.sincronizar_catalogos()
+        estudiante = Estudiante(nombre='estres', email='estres@bench', password_hash='x', puntos=SALDO_INICIAL)
+        db.session.add(estudiante)
+        db.session.commit()
+        estudiante_id = estudiante.id
+        objeto_id = aplicacion.obtener_catalogo('objetos')[0].id
+
+    debitos_ok = []
+    compras_ok = []
+
+    def debitar_y_acreditar(i):
+        with app.app_context():
+            for _ in range(operaciones):
+                def paso():
+                    estudiante = db.session.get(Estudiante, estudiante_id)
+                    ok = aplicacion.debitar(estudiante, PRECIO)
+                    aplicacion.acreditar(estudiante, xp=1)
+                    db.session.commit()
+                    return ok
+                if con_reintentos(paso):
+                    debitos_ok.append(1)
+
+    def comprar_mismo_objeto(i):
+        with app.app_context():
+            def paso():
+                try:
+                    db.session.add(Inventario(estudiante_id=estudiante_id, objeto_id=objeto_id))
+                    db.session.commit()
+                    return True
+                except IntegrityError:
+                    db.session.rollback()
+                    return False
+            if con_reintentos(paso):
+                compras_ok.append(1)
+
+    en_hilos(hilos, debitar_y_acreditar)
+    en_hilos(hilos, comprar_mismo_objeto)
+
+    with app.app_context():
+        estudiante = db.session.get(Estudiante, estudiante_id)
+        items = Inventario.query.filter_by(estudiante_id=estudiante_id, objeto_id=objeto_id).count()
+
+    esperado_puntos = SALDO_INICIAL - PRECIO * len(debitos_ok)
+    esperado_xp = hilos * operaciones
+    print(f"hilos={hilos} operaciones={hilos * operaciones} débitos aceptados={len(debitos_ok)}")
+    print(f"puntos={estudiante.puntos} (esperado {esperado_puntos}) xp={estudiante.xp} (esperado {esperado_xp})")
+    print(f"compras simultáneas del mismo objeto aceptadas={len(compras_ok)} filas en inventario={items}")
+
+    assert estudiante.puntos == esperado_puntos and estudiante.puntos >= 0, "se perdieron débitos o hubo sobregiro"
+    assert estudiante.xp == esperado_xp, "se perdieron créditos de XP"
+    assert len(compras_ok) == 1 and items == 1, "se duplicó un objeto en el inventario"
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
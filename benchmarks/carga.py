@@ -0,0 +1,212 @@
+"""Benchmark de carga de las rutas más usadas.
+
+Crea N estudiantes y simula su tráfico (login, /, /tienda, /comprar, /misiones,
+/ranking, /juego/resultado y lotes de /juego/resultados) con el cliente de
+pruebas de Flask, repartido en varios procesos. Informa latencia p50/p99, throughput y consultas SQL por
+petición, y las compara con una línea base guardada en JSON: termina con
+error si alguna ruta hace más consultas que en la línea base. Las latencias
+solo se informan, porque dependen de la máquina.
+
+Un resultado suelto en /juego/resultado cuesta unas 7 sentencias, y no baja de
+ahí: cargar al estudiante, registrar la clave, la partida, bloquear y leer el
+progreso, escribir el progreso, el resumen y, si se completa una misión, el
+saldo y los logros son escrituras en tablas distintas, que SQLite y MySQL no
+pueden juntar en una sola sentencia. Lo que se amortiza es el lote: los
+RESULTADOS_POR_LOTE resultados de /juego/resultados comparten todas esas
+sentencias y quedan por debajo de 2 por resultado.
+
+Por defecto usa una base SQLite temporal; con DATABASE_URL apunta a otra
+(por ejemplo un PostgreSQL local vacío).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.carga [--estudiantes N] [--rondas R] [--procesos P]
+    python -m benchmarks.carga --guardar-linea-base
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{_db.name}')
+os.environ['METRICAS_CABECERA'] = '1'
+# Todo el tráfico sale de 127.0.0.1: sin esto el limitador de login lo cortaría.
+os.environ.setdefault('AUTH_INTENTOS_IP', '1000000000')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as aplicacion  # noqa: E402
+from app import app, db, Estudiante  # noqa: E402
+
+RUTA_LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linea_base.json')
+PASSWORD = 'benchmark'
+# Las partidas de Tic-Tac-Toe enviadas por el cliente se validan con sus jugadas.
+JUEGOS = [
+    {'juego': 'tictactoe', 'resultado': 'ganado', 'dificultad': 'normal', 'jugadas': [0, 3, 1, 4, 2]},
+    {'juego': 'tictactoe', 'resultado': 'perdido', 'dificultad': 'dificil', 'jugadas': [0, 3, 1, 4, 8, 5]},
+    {'juego': 'memoria', 'resultado': 'ganado', 'dificultad': 'facil'},
+]
+RESULTADOS_POR_LOTE = 5
+
+
+def sembrar(cantidad):
+    azar = random.Random(cantidad)
+    with app.app_context():
+        db.create_all()
+        aplicacion.sincronizar_catalogos()
+        # Un solo hash para todos: el coste del KDF se mide en el login, no aquí.
+        password_hash = aplicacion.hasher.generar(PASSWORD)
+        inicio = Estudiante.query.count()
+        filas = []
+        for i in range(inicio, inicio + cantidad):
+            xp = azar.randint(0, 2000)
+            filas.append(dict(nombre=f"bench_{i}", email=f"bench_{i}@bench", password_hash=password_hash,
+                              puntos=azar.randint(0, 500), xp=xp, nivel=aplicacion.calcular_nivel_para_xp(xp)))
+        db.session.execute(db.insert(Estudiante), filas)
+        ids = db.session.scalars(db.select(Estudiante.id).where(Estudiante.email.in_([f['email'] for f in filas])))
+        db.session.execute(db.insert(aplicacion.ResumenEstudiante), [
+            {'estudiante_id': estudiante_id, 'misiones_activas': 0, 'misiones_destacadas': []} for estudiante_id in ids
+        ])
+        db.session.commit()
+        return [f"bench_{i}@bench" for i in range(inicio, inicio + cantidad)]
+
+
+def simular(emails, rondas, semilla):
+    """Tráfico de un proceso: cada estudiante inicia sesión y hace `rondas` visitas."""
+    with app.app_context():
+        db.engine.dispose(close=False)
+        objetos = [objeto.id for objeto in aplicacion.obtener_catalogo('objetos')]
+    azar = random.Random(semilla)
+    muestras = []
+
+    def medir(nombre, cliente, metodo, url, **kwargs):
+        inicio = time.perf_counter()
+        respuesta = getattr(cliente, metodo)(url, **kwargs)
+        duracion = (time.perf_counter() - inicio) * 1000
+        muestras.append((nombre, duracion, int(respuesta.headers.get('X-Consultas-SQL', 0)), respuesta.status_code))
+        respuesta.close()
+
+    for email in emails:
+        cliente = app.test_client()
+        medir('login', cliente, 'post', '/login', data={'email': email, 'password': PASSWORD})
+        for _ in range(rondas):
+            medir('index', cliente, 'get', '/')
+            medir('tienda', cliente, 'get', '/tienda')
+            medir('comprar', cliente, 'get', f"/comprar/{azar.choice(objetos)}")
+            medir('misiones', cliente, 'get', '/misiones')
+            medir('ranking', cliente, 'get', '/ranking')
+            medir('juego_resultado', cliente, 'post', '/juego/resultado', json=dict(azar.choice(JUEGOS), duracion_ms=30000))
+        # Al final, para no cambiar el saldo con el que se mide /comprar.
+        medir('juego_resultados', cliente, 'post', '/juego/resultados', json={'resultados': [
+            dict(azar.choice(JUEGOS), clave=f"{email}:{i}", duracion_ms=30000) for i in range(RESULTADOS_POR_LOTE)
+        ]})
+    return muestras
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def resumir(muestras, segundos):
+    rutas = {}
+    for nombre, duracion, consultas, estado in muestras:
+        ruta = rutas.setdefault(nombre, {'ms': [], 'consultas': [], 'errores': 0})
+        ruta['ms'].append(duracion)
+        ruta['consultas'].append(consultas)
+        ruta['errores'] += estado >= 500
+    return {
+        nombre: {
+            'peticiones': len(ruta['ms']),
+            'p50_ms': round(percentil(ruta['ms'], 50), 2),
+            'p99_ms': round(percentil(ruta['ms'], 99), 2),
+            # La mediana ignora las recargas periódicas de cachés (ranking, catálogos).
+            'consultas': statistics.median_low(ruta['consultas']),
+            'consultas_max': max(ruta['consultas']),
+            'errores': ruta['errores'],
+            'rps': round(len(ruta['ms']) / segundos, 1),
+        }
+        for nombre, ruta in sorted(rutas.items())
+    }
+
+
+def comparar(resultado, linea_base):
+    regresiones = []
+    print(f"\n{'ruta':<16} {'pet.':>6} {'p50 ms':>8} {'p99 ms':>8} {'consultas':>10} {'base':>5} {'p50 base':>9} {'errores':>8}")
+    for nombre, datos in resultado.items():
+        base = linea_base.get(nombre, {})
+        consultas_base = base.get('consultas')
+        marca = ''
+        if consultas_base is not None and datos['consultas'] > consultas_base:
+            regresiones.append(f"{nombre}: {datos['consultas']} consultas (línea base {consultas_base})")
+            marca = ' <-'
+        print(f"{nombre:<16} {datos['peticiones']:>6} {datos['p50_ms']:>8.1f} {datos['p99_ms']:>8.1f} "
+              f"{datos['consultas']:>10} {consultas_base if consultas_base is not None else '-':>5} "
+              f"{base.get('p50_ms', '-'):>9} {datos['errores']:>8}{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--estudiantes', type=int, default=200)
+    parser.add_argument('--rondas', type=int, default=3, help='Visitas completas por estudiante.')
+    parser.add_argument('--procesos', type=int, default=1, help='Procesos que generan tráfico en paralelo.')
+    parser.add_argument('--linea-base', default=RUTA_LINEA_BASE)
+    parser.add_argument('--guardar-linea-base', action='store_true', help='Sobrescribe la línea base con este resultado.')
+    argumentos = parser.parse_args()
+
+    # Las consultas por petición dependen de la carga (cuántas misiones se
+    # crean o completan), así que solo se compara con una línea base generada
+    # con los mismos parámetros.
+    parametros = {'estudiantes': argumentos.estudiantes, 'rondas': argumentos.rondas}
+    linea_base = {'parametros': parametros, 'rutas': {}}
+    if os.path.exists(argumentos.linea_base) and not argumentos.guardar_linea_base:
+        with open(argumentos.linea_base, encoding='utf-8') as f:
+            linea_base = json.load(f)
+        if linea_base['parametros'] != parametros:
+            print(f"La línea base se generó con {linea_base['parametros']}; repite con esos parámetros "
+                  f"o guarda una nueva con --guardar-linea-base.")
+            sys.exit(2)
+
+    emails = sembrar(argumentos.estudiantes)
+    trozos = [emails[i::argumentos.procesos] for i in range(argumentos.procesos)]
+
+    inicio = time.perf_counter()
+    if argumentos.procesos == 1:
+        muestras = simular(trozos[0], argumentos.rondas, 0)
+    else:
+        contexto = multiprocessing.get_context('spawn')
+        with contexto.Pool(argumentos.procesos) as pool:
+            partes = pool.starmap(simular, [(trozo, argumentos.rondas, i) for i, trozo in enumerate(trozos)])
+        muestras = [muestra for parte in partes for muestra in parte]
+    segundos = time.perf_counter() - inicio
+
+    resultado = resumir(muestras, segundos)
+    print(f"{len(muestras)} peticiones en {segundos:.1f} s ({len(muestras) / segundos:.1f} peticiones/s, "
+          f"{argumentos.procesos} procesos, {os.environ['DATABASE_URL'].split(':', 1)[0]})")
+
+    regresiones = comparar(resultado, linea_base['rutas'])
+    errores = sum(datos['errores'] for datos in resultado.values())
+
+    if argumentos.guardar_linea_base:
+        with open(argumentos.linea_base, 'w', encoding='utf-8') as f:
+            json.dump({'parametros': parametros, 'rutas': resultado}, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"\nLínea base guardada en {argumentos.linea_base}")
+        return
+    if regresiones or errores:
+        print("\nREGRESIÓN:" if regresiones else "\nERRORES:")
+        for linea in regresiones:
+            print(f"  {linea}")
+        if errores:
+            print(f"  {errores} respuestas 5xx")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == '__main__':
+    main()
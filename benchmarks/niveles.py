@@ -0,0 +1,85 @@
+"""Consultas SQL necesarias para procesar saltos grandes de XP.
+
+Compara la evaluación anterior (un nivel por iteración y una subconsulta
+anti-join de logros por nivel) con verificar_y_actualizar_nivel.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.niveles
+"""
+import os
+import sys
+import tempfile
+import time
+
+_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{_db.name}')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+
+import app as aplicacion  # noqa: E402
+from app import app, db, Estudiante, Logro, flash  # noqa: E402
+
+SALTOS_XP = [100, 1_000, 10_000, 100_000]
+
+
+def nivel_anterior(estudiante):
+    """Implementación previa, conservada solo como referencia para la comparación."""
+    def asignar_logros():
+        disponibles = Logro.query.filter(
+            Logro.nivel_requerido <= estudiante.nivel,
+            ~Logro.estudiantes.any(id=estudiante.id)
+        ).all()
+        for logro in disponibles:
+            estudiante.logros.append(logro)
+            flash(f"Logro: {logro.nombre}", "success")
+
+    while estudiante.xp >= aplicacion.calcular_xp_para_siguiente_nivel(estudiante.nivel):
+        estudiante.nivel += 1
+        flash(f"Nivel {estudiante.nivel}", "info")
+        asignar_logros()
+    asignar_logros()
+
+
+def medir(funcion, xp):
+    with app.test_request_context():
+        estudiante = Estudiante(nombre=f"bench_{funcion.__name__}_{xp}", email=f"{funcion.__name__}_{xp}@bench",
+                                password_hash='x', puntos=0, xp=0, nivel=1)
+        db.session.add(estudiante)
+        db.session.commit()
+        db.session.refresh(estudiante)
+        aplicacion.obtener_catalogo('logros')
+
+        estudiante.xp = xp
+        contador = {'consultas': 0}
+
+        def contar(*args):
+            contador['consultas'] += 1
+
+        event.listen(db.engine, 'before_cursor_execute', contar)
+        inicio = time.perf_counter()
+        try:
+            funcion(estudiante)
+            db.session.flush()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', contar)
+        duracion = (time.perf_counter() - inicio) * 1000
+        db.session.commit()
+        return estudiante.nivel, contador['consultas'], duracion
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+        aplicacion.sincronizar_catalogos()
+
+    print(f"{'XP':>8} {'nivel':>6} | {'consultas antes':>15} {'ms antes':>9} | {'consultas ahora':>15} {'ms ahora':>9}")
+    for xp in SALTOS_XP:
+        nivel_a, consultas_a, ms_a = medir(nivel_anterior, xp)
+        nivel_b, consultas_b, ms_b = medir(aplicacion.verificar_y_actualizar_nivel, xp)
+        assert nivel_a == nivel_b, (nivel_a, nivel_b)
+        print(f"{xp:>8} {nivel_b:>6} | {consultas_a:>15} {ms_a:>9.1f} | {consultas_b:>15} {ms_b:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# Caché de catálogos estáticos (Objeto, Logro, Actividad, Mision).
+#
+# Cada catálogo se guarda como una instantánea inmutable (tupla de namedtuples)
+# bajo la clave "<catalogo>:v<version>". La versión sale de catalogo_version y
+# se incrementa en cada sincronización, así que un cambio de catálogo invalida
+# todas las entradas sin tener que borrarlas una por una.
+#
+# Niveles: una LRU en memoria por proceso y, opcionalmente, un backend
+# compartido entre workers (Redis en producción, BackendMemoria en pruebas).
+
+
+class CacheLRU:
+    """LRU en memoria con TTL por entrada. Segura entre hilos."""
+
+    def __init__(self, max_entradas=128, ttl=300):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, expira = entrada
+            if expira is not None and expira < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expira = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def delete(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+
+class BackendMemoria:
+    """Backend compartido de reemplazo: mismo contrato que BackendRedis, en un dict."""
+
+    def __init__(self):
+        self._lru = CacheLRU(max_entradas=10000, ttl=0)
+
+    def get(self, clave):
+        return self._lru.get(clave)
+
+    def set(self, clave, valor, ttl=None):
+        self._lru.set(clave, valor, ttl)
+
+    def delete(self, clave):
+        self._lru.delete(clave)
+
+
+class BackendRedis:
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CATALOGO_CACHE_URL requiere el paquete 'redis' (pip install redis).") from e
+        self._cliente = redis.Redis.from_url(url)
+
+    def get(self, clave):
+        valor = self._cliente.get(clave)
+        return valor.decode('utf-8') if valor is not None else None
+
+    def set(self, clave, valor, ttl=None):
+        self._cliente.set(clave, valor, ex=ttl or None)
+
+    def delete(self, clave):
+        self._cliente.delete(clave)
+
+
+def crear_backend_compartido(url):
+    if not url:
+        return None
+    if url == 'memory://':
+        return BackendMemoria()
+    return BackendRedis(url)
+
+
+_tipos_instantanea = {}
+
+
+def congelar(catalogo, filas):
+    """Convierte una lista de dicts en una tupla inmutable de namedtuples."""
+    if not filas:
+        return ()
+    campos = tuple(filas[0].keys())
+    tipo = _tipos_instantanea.get((catalogo, campos))
+    if tipo is None:
+        tipo = namedtuple(f"Instantanea_{catalogo}", campos)
+        _tipos_instantanea[(catalogo, campos)] = tipo
+    return tuple(tipo(**fila) for fila in filas)
+
+
+class CacheCatalogos:
+    CLAVE_VERSION = 'catalogos:version'
+
+    def __init__(self, local=None, compartido=None, intervalo_version=30):
+        self.local = local or CacheLRU()
+        self.compartido = compartido
+        self.intervalo_version = intervalo_version
+        self._version = None
+        self._version_leida_en = 0.0
+
+    def version(self, leer_version):
+        """Versión vigente; se relee como mucho cada intervalo_version segundos."""
+        ahora = time.monotonic()
+        if self._version is None or ahora - self._version_leida_en > self.intervalo_version:
+            version = None
+            if self.compartido is not None:
+                version = self.compartido.get(self.CLAVE_VERSION)
+            if version is None:
+                version = leer_version()
+                if self.compartido is not None:
+                    self.compartido.set(self.CLAVE_VERSION, str(version))
+            self._version = int(version)
+            self._version_leida_en = ahora
+        return self._version
+
+    def obtener(self, catalogo, version, cargar):
+        """Instantánea del catálogo; cargar() devuelve una lista de dicts si falta."""
+        clave = f"{catalogo}:v{version}"
+        instantanea = self.local.get(clave)
+        if instantanea is not None:
+            return instantanea
+
+        filas = None
+        if self.compartido is not None:
+            serializado = self.compartido.get(clave)
+            if serializado is not None:
+                filas = json.loads(serializado)
+        if filas is None:
+            filas = cargar()
+            if self.compartido is not None:
+                self.compartido.set(clave, json.dumps(filas), self.local.ttl)
+
+        instantanea = congelar(catalogo, filas)
+        self.local.set(clave, instantanea)
+        return instantanea
+
+    def publicar_version(self, version):
+        """Llamar tras sincronizar catálogos: todos los workers ven la nueva versión."""
+        if self.compartido is not None:
+            self.compartido.set(self.CLAVE_VERSION, str(version))
+        self.local.clear()
+        self._version = int(version)
+        self._version_leida_en = time.monotonic()
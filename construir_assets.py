@@ -0,0 +1,254 @@
+"""Genera variantes optimizadas de las imágenes y copias con huella de static/.
+
+1. Imágenes: para cada imagen de static/img crea versiones redimensionadas en
+   WebP (y AVIF si Pillow lo soporta); los GIF animados se convierten a WebP
+   animado. Se escriben en static/build/img con el hash de su contenido en el
+   nombre y se registran en static/build/imagenes.json (ver url_imagen /
+   imagen_responsiva en app.py).
+2. Estáticos: copia cada archivo de static/ a static/build/estaticos con el
+   hash en el nombre, junto con versiones .gz (y .br si está instalado el
+   paquete brotli) de los archivos de texto, y registra el mapeo en
+   static/build/estaticos.json. La aplicación reescribe url_for('static') con
+   ese manifiesto y sirve las copias con caché inmutable de un año.
+
+Uso:
+    python construir_assets.py [--procesos N] [--forzar]
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageSequence, features
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RAIZ_ESTATICOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+CARPETA_ORIGEN = os.path.join(RAIZ_ESTATICOS, 'img')
+CARPETA_DESTINO = os.path.join(RAIZ_ESTATICOS, 'build', 'img')
+RUTA_MANIFIESTO = os.path.join(RAIZ_ESTATICOS, 'build', 'imagenes.json')
+CARPETA_ESTATICOS = os.path.join(RAIZ_ESTATICOS, 'build', 'estaticos')
+RUTA_MANIFIESTO_ESTATICOS = os.path.join(RAIZ_ESTATICOS, 'build', 'estaticos.json')
+EXTENSIONES_COMPRIMIBLES = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+# Avatares subidos en tiempo de ejecución: tienen su propio procesamiento (avatares.py).
+CARPETA_SUBIDOS = os.path.join(CARPETA_ORIGEN, 'avatares', 'subidos')
+
+EXTENSIONES = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+# Los avatares, marcos y objetos se muestran a ~120px (240px en pantallas 2x);
+# los fondos cubren la pantalla completa.
+ANCHOS = (120, 240, 480, 960, 1920)
+ANCHOS_ANIMADOS = (120, 240, 480)
+CALIDAD = {'webp': 80, 'avif': 55}
+
+
+def formatos_disponibles():
+    formatos = ['webp']
+    if features.check('avif'):
+        formatos.insert(0, 'avif')
+    return formatos
+
+
+def hash_archivo(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 16), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def anchos_para(ancho_original, anchos):
+    elegidos = [a for a in anchos if a < ancho_original]
+    elegidos.append(min(ancho_original, anchos[-1]))
+    return sorted(set(elegidos))
+
+
+def redimensionar(imagen, ancho):
+    if imagen.width == ancho:
+        return imagen.copy()
+    alto = max(1, round(imagen.height * ancho / imagen.width))
+    return imagen.resize((ancho, alto), Image.LANCZOS)
+
+
+def codificar_estatica(imagen, formato):
+    if imagen.mode not in ('RGB', 'RGBA'):
+        imagen = imagen.convert('RGBA' if 'transparency' in imagen.info or imagen.mode in ('LA', 'P') else 'RGB')
+    buffer = io.BytesIO()
+    imagen.save(buffer, formato.upper(), quality=CALIDAD[formato], method=6 if formato == 'webp' else None)
+    return buffer.getvalue()
+
+
+def codificar_animada(imagen, ancho):
+    cuadros, duraciones = [], []
+    for cuadro in ImageSequence.Iterator(imagen):
+        cuadros.append(redimensionar(cuadro.convert('RGBA'), ancho))
+        duraciones.append(cuadro.info.get('duration', imagen.info.get('duration', 100)))
+    buffer = io.BytesIO()
+    cuadros[0].save(buffer, 'WEBP', save_all=True, append_images=cuadros[1:], duration=duraciones,
+                    loop=imagen.info.get('loop', 0), quality=CALIDAD['webp'], method=4)
+    return buffer.getvalue()
+
+
+def escribir_variante(relativa, ancho, formato, contenido):
+    base, _ = os.path.splitext(relativa)
+    huella = hashlib.sha256(contenido).hexdigest()[:10]
+    destino_relativo = f"{base}-{ancho}.{huella}.{formato}"
+    destino = os.path.join(CARPETA_DESTINO, destino_relativo)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    if not os.path.exists(destino):
+        with open(destino, 'wb') as f:
+            f.write(contenido)
+    return {'ancho': ancho, 'url': f"build/img/{destino_relativo}", 'bytes': len(contenido)}
+
+
+def procesar_imagen(relativa, fuente, formatos):
+    ruta = os.path.join(CARPETA_ORIGEN, relativa)
+    with Image.open(ruta) as imagen:
+        animada = getattr(imagen, 'is_animated', False)
+        entrada = {
+            'fuente': fuente,
+            'ancho': imagen.width,
+            'alto': imagen.height,
+            'bytes': os.path.getsize(ruta),
+            'animada': animada,
+            'variantes': {},
+        }
+        if animada:
+            entrada['variantes']['webp'] = [
+                escribir_variante(relativa, ancho, 'webp', codificar_animada(imagen, ancho))
+                for ancho in anchos_para(imagen.width, ANCHOS_ANIMADOS)
+            ]
+            return relativa, entrada
+
+        imagen.load()
+        for formato in formatos:
+            entrada['variantes'][formato] = [
+                escribir_variante(relativa, ancho, formato, codificar_estatica(redimensionar(imagen, ancho), formato))
+                for ancho in anchos_para(imagen.width, ANCHOS)
+            ]
+    return relativa, entrada
+
+
+def listar_imagenes():
+    for carpeta, subcarpetas, archivos in os.walk(CARPETA_ORIGEN):
+        subcarpetas[:] = [d for d in subcarpetas if os.path.join(carpeta, d) != CARPETA_SUBIDOS]
+        for nombre in archivos:
+            if os.path.splitext(nombre)[1].lower() in EXTENSIONES:
+                yield os.path.relpath(os.path.join(carpeta, nombre), CARPETA_ORIGEN).replace(os.sep, '/')
+
+
+def variantes_existen(entrada):
+    return all(
+        os.path.exists(os.path.join(RAIZ_ESTATICOS, v['url']))
+        for variantes in entrada['variantes'].values() for v in variantes
+    )
+
+
+def limpiar_huerfanos(manifiesto):
+    usados = {
+        os.path.normpath(os.path.join(RAIZ_ESTATICOS, v['url']))
+        for entrada in manifiesto.values() for variantes in entrada['variantes'].values() for v in variantes
+    }
+    borrados = 0
+    for carpeta, _, archivos in os.walk(CARPETA_DESTINO):
+        for nombre in archivos:
+            ruta = os.path.normpath(os.path.join(carpeta, nombre))
+            if ruta not in usados:
+                os.remove(ruta)
+                borrados += 1
+    return borrados
+
+
+def construir(procesos=None, forzar=False):
+    anterior = {}
+    if os.path.exists(RUTA_MANIFIESTO) and not forzar:
+        with open(RUTA_MANIFIESTO, encoding='utf-8') as f:
+            anterior = json.load(f)
+
+    formatos = formatos_disponibles()
+    manifiesto, pendientes = {}, []
+    for relativa in sorted(listar_imagenes()):
+        fuente = hash_archivo(os.path.join(CARPETA_ORIGEN, relativa))
+        previa = anterior.get(relativa)
+        if previa and previa['fuente'] == fuente and variantes_existen(previa):
+            manifiesto[relativa] = previa
+        else:
+            pendientes.append((relativa, fuente))
+
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        futuros = [ejecutor.submit(procesar_imagen, relativa, fuente, formatos) for relativa, fuente in pendientes]
+        for futuro in futuros:
+            relativa, entrada = futuro.result()
+            manifiesto[relativa] = entrada
+            mejor = min(v['bytes'] for variantes in entrada['variantes'].values() for v in variantes)
+            print(f"{relativa}: {entrada['bytes'] // 1024} KB -> desde {mejor // 1024} KB")
+
+    os.makedirs(os.path.dirname(RUTA_MANIFIESTO), exist_ok=True)
+    with open(RUTA_MANIFIESTO, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(manifiesto.items())), f, indent=1)
+
+    borrados = limpiar_huerfanos(manifiesto)
+    print(f"{len(pendientes)} imágenes procesadas, {len(manifiesto) - len(pendientes)} sin cambios, "
+          f"{borrados} variantes obsoletas eliminadas. Formatos: {', '.join(formatos)}.")
+
+
+def precomprimir(ruta):
+    with open(ruta, 'rb') as f:
+        contenido = f.read()
+    comprimido = gzip.compress(contenido, compresslevel=9, mtime=0)
+    if len(comprimido) < len(contenido):
+        with open(ruta + '.gz', 'wb') as f:
+            f.write(comprimido)
+    if brotli is not None:
+        comprimido = brotli.compress(contenido, quality=11)
+        if len(comprimido) < len(contenido):
+            with open(ruta + '.br', 'wb') as f:
+                f.write(comprimido)
+
+
+def construir_estaticos():
+    manifiesto = {}
+    carpeta_build = os.path.join(RAIZ_ESTATICOS, 'build')
+    for carpeta, subcarpetas, archivos in os.walk(RAIZ_ESTATICOS):
+        subcarpetas[:] = [d for d in subcarpetas if os.path.join(carpeta, d) not in (carpeta_build, CARPETA_SUBIDOS)]
+        for nombre in archivos:
+            origen = os.path.join(carpeta, nombre)
+            relativa = os.path.relpath(origen, RAIZ_ESTATICOS).replace(os.sep, '/')
+            base, extension = os.path.splitext(relativa)
+            destino_relativo = f"{base}.{hash_archivo(origen)[:10]}{extension}"
+            destino = os.path.join(CARPETA_ESTATICOS, destino_relativo)
+            if not os.path.exists(destino):
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                shutil.copyfile(origen, destino)
+                if extension.lower() in EXTENSIONES_COMPRIMIBLES:
+                    precomprimir(destino)
+            manifiesto[relativa] = f"build/estaticos/{destino_relativo}"
+
+    usados = {os.path.normpath(os.path.join(RAIZ_ESTATICOS, ruta)) for ruta in manifiesto.values()}
+    borrados = 0
+    for carpeta, _, archivos in os.walk(CARPETA_ESTATICOS):
+        for nombre in archivos:
+            ruta = os.path.normpath(os.path.join(carpeta, nombre))
+            if ruta not in usados and ruta[:-3] not in usados:
+                os.remove(ruta)
+                borrados += 1
+
+    with open(RUTA_MANIFIESTO_ESTATICOS, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(manifiesto.items())), f, indent=1)
+    print(f"{len(manifiesto)} archivos estáticos con huella, {borrados} copias obsoletas eliminadas. "
+          f"Precompresión: gzip{', brotli' if brotli else ''}.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (por defecto, uno por CPU).')
+    parser.add_argument('--forzar', action='store_true', help='Regenera todas las variantes.')
+    argumentos = parser.parse_args()
+    construir(argumentos.procesos, argumentos.forzar)
+    construir_estaticos()
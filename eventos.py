@@ -0,0 +1,142 @@
+import json
+import queue
+import threading
+import time
+
+# Publicación/suscripción de eventos por canal (un canal por estudiante).
+#
+# BrokerMemoria reparte los mensajes dentro del proceso: basta con un solo
+# worker y es el reemplazo local para desarrollo y pruebas. Con varios workers,
+# BrokerRedis usa PUBLISH/SUBSCRIBE de Redis para que un evento generado en un
+# proceso llegue a la conexión abierta en otro; cada proceso se suscribe en
+# Redis solo a los canales que tienen algún oyente local.
+#
+# publicar() devuelve cuántos oyentes recibieron el mensaje (con Redis, cuántos
+# procesos); 0 quiere decir que nadie lo estaba escuchando.
+
+
+def formato_sse(evento, datos):
+    """Mensaje de server-sent events listo para escribir en la respuesta."""
+    return f"event: {evento}\ndata: {json.dumps(datos)}\n\n"
+
+
+class BrokerMemoria:
+    def __init__(self):
+        self._oyentes = {}
+        self._lock = threading.Lock()
+
+    def suscribir(self, canal, entregar):
+        """Llama a entregar(mensaje) con cada mensaje de `canal`. Devuelve una función para cancelar."""
+        with self._lock:
+            self._oyentes[canal] = self._oyentes.get(canal, ()) + (entregar,)
+
+        def cancelar():
+            with self._lock:
+                restantes = tuple(oyente for oyente in self._oyentes.get(canal, ()) if oyente is not entregar)
+                if restantes:
+                    self._oyentes[canal] = restantes
+                else:
+                    self._oyentes.pop(canal, None)
+        return cancelar
+
+    def publicar(self, canal, mensaje):
+        # entregar() no debe bloquear: se llama desde el hilo que publica.
+        oyentes = self._oyentes.get(canal, ())
+        for entregar in oyentes:
+            entregar(mensaje)
+        return len(oyentes)
+
+    def canales(self):
+        with self._lock:
+            return list(self._oyentes)
+
+    def uso(self):
+        with self._lock:
+            return {'canales': len(self._oyentes), 'oyentes': sum(map(len, self._oyentes.values()))}
+
+
+class BrokerRedis:
+    """Mismo contrato que BrokerMemoria, con los mensajes pasando por Redis.
+
+    Un hilo por proceso lee de la conexión SUBSCRIBE y reparte los mensajes a
+    los oyentes locales; las altas y bajas de canales se le pasan por una cola
+    para que solo ese hilo use la conexión.
+    """
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("EVENTOS_BROKER_URL requiere el paquete 'redis' (pip install redis).") from e
+        self._cliente = redis.Redis.from_url(url)
+        self._local = BrokerMemoria()
+        self._cambios = queue.Queue()
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def suscribir(self, canal, entregar):
+        with self._lock:
+            nuevo = canal not in self._local.canales()
+            cancelar_local = self._local.suscribir(canal, entregar)
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._escuchar, name='eventos-redis', daemon=True)
+                self._hilo.start()
+        if nuevo:
+            self._cambios.put(('subscribe', canal))
+
+        def cancelar():
+            with self._lock:
+                cancelar_local()
+                vacio = canal not in self._local.canales()
+            if vacio:
+                self._cambios.put(('unsubscribe', canal))
+        return cancelar
+
+    def publicar(self, canal, mensaje):
+        return self._cliente.publish(canal, mensaje)
+
+    def canales(self):
+        return self._local.canales()
+
+    def uso(self):
+        return self._local.uso()
+
+    def _aplicar_cambios(self, pubsub):
+        while True:
+            try:
+                accion, canal = self._cambios.get_nowait()
+            except queue.Empty:
+                return
+            # Puede haber llegado una baja y otra alta del mismo canal: manda el estado actual.
+            activo = canal in self._local.canales()
+            if accion == 'subscribe' and activo:
+                pubsub.subscribe(canal)
+            elif accion == 'unsubscribe' and not activo and canal.encode() in pubsub.channels:
+                pubsub.unsubscribe(canal)
+
+    def _escuchar(self):
+        while True:
+            pubsub = self._cliente.pubsub(ignore_subscribe_messages=True)
+            try:
+                canales = self._local.canales()
+                if canales:
+                    pubsub.subscribe(*canales)
+                while True:
+                    self._aplicar_cambios(pubsub)
+                    if not pubsub.subscribed:
+                        time.sleep(0.2)
+                        continue
+                    mensaje = pubsub.get_message(timeout=0.5)
+                    if mensaje and mensaje['type'] == 'message':
+                        self._local.publicar(mensaje['channel'].decode(), mensaje['data'].decode('utf-8'))
+            except Exception as e:
+                print(f"Error en la suscripción de eventos a Redis: {e}")
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+
+def crear_broker(url):
+    if not url or url == 'memory://':
+        return BrokerMemoria()
+    return BrokerRedis(url)
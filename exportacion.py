@@ -0,0 +1,44 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+# Escritores por generador: reciben un iterable de filas y producen el archivo
+# trozo a trozo, sin acumular nada en memoria. Sirven igual para una respuesta
+# HTTP en streaming que para escribir en un archivo desde la línea de comandos.
+
+
+def _valor(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def escribir_csv(columnas, filas, filas_por_bloque=500):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+    for i, fila in enumerate(filas, start=1):
+        escritor.writerow([_valor(v) for v in fila])
+        if i % filas_por_bloque == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def escribir_jsonl(columnas, filas, filas_por_bloque=500):
+    bloque = []
+    for fila in filas:
+        bloque.append(json.dumps(dict(zip(columnas, (_valor(v) for v in fila))), ensure_ascii=False))
+        if len(bloque) == filas_por_bloque:
+            yield '\n'.join(bloque) + '\n'
+            bloque = []
+    if bloque:
+        yield '\n'.join(bloque) + '\n'
+
+
+FORMATOS = {
+    'csv': (escribir_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (escribir_jsonl, 'application/x-ndjson; charset=utf-8'),
+}
@@ -0,0 +1,165 @@
+import bisect
+import threading
+import time
+
+from flask import g, has_request_context, request, request_started, request_finished, before_render_template, template_rendered
+from sqlalchemy import event
+
+# Instrumentación por ruta: número de consultas SQL, tiempo en base de datos,
+# tiempo de render de plantillas y latencia total de cada petición, agregados
+# por endpoint y expuestos en formato de texto de Prometheus.
+#
+# Los contadores viven en memoria del proceso: con varios workers de gunicorn
+# cada uno expone los suyos y Prometheus ve el del worker que atienda el scrape.
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_CONSULTAS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.cubetas = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.cuenta = 0
+
+    def observar(self, valor):
+        self.cubetas[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cuenta += 1
+
+    def acumuladas(self):
+        total = 0
+        for limite, cantidad in zip(self.limites + (float('inf'),), self.cubetas):
+            total += cantidad
+            yield ('+Inf' if limite == float('inf') else repr(limite)), total
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._peticiones = {}
+        self._rutas = {}
+
+    def registrar(self, endpoint, metodo, estado, consultas, segundos_db, segundos_plantilla, segundos_total):
+        with self._lock:
+            clave = (endpoint, metodo, str(estado))
+            self._peticiones[clave] = self._peticiones.get(clave, 0) + 1
+            ruta = self._rutas.get(endpoint)
+            if ruta is None:
+                ruta = self._rutas[endpoint] = {
+                    'consultas': Histograma(LIMITES_CONSULTAS),
+                    'latencia': Histograma(LIMITES_SEGUNDOS),
+                    'db': 0.0,
+                    'plantilla': 0.0,
+                }
+            ruta['consultas'].observar(consultas)
+            ruta['latencia'].observar(segundos_total)
+            ruta['db'] += segundos_db
+            ruta['plantilla'] += segundos_plantilla
+
+    def resumen(self):
+        """Consultas medias y latencia media por endpoint (para depurar a mano)."""
+        with self._lock:
+            return {
+                endpoint: {
+                    'peticiones': ruta['latencia'].cuenta,
+                    'consultas_media': ruta['consultas'].suma / ruta['latencia'].cuenta,
+                    'latencia_media_ms': ruta['latencia'].suma * 1000 / ruta['latencia'].cuenta,
+                }
+                for endpoint, ruta in self._rutas.items()
+            }
+
+    def exponer(self, extra=()):
+        """Texto en formato de exposición de Prometheus. `extra` son líneas adicionales ya formateadas."""
+        lineas = [
+            '# HELP http_peticiones_total Peticiones atendidas por endpoint, método y estado.',
+            '# TYPE http_peticiones_total counter',
+        ]
+        with self._lock:
+            for (endpoint, metodo, estado), total in sorted(self._peticiones.items()):
+                lineas.append(f'http_peticiones_total{{endpoint="{endpoint}",metodo="{metodo}",estado="{estado}"}} {total}')
+            for nombre, clave, ayuda in (
+                ('http_consultas_sql', 'consultas', 'Consultas SQL por petición.'),
+                ('http_latencia_segundos', 'latencia', 'Latencia total de la petición.'),
+            ):
+                lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} histogram']
+                for endpoint, ruta in sorted(self._rutas.items()):
+                    histograma = ruta[clave]
+                    for limite, acumulado in histograma.acumuladas():
+                        lineas.append(f'{nombre}_bucket{{endpoint="{endpoint}",le="{limite}"}} {acumulado}')
+                    lineas.append(f'{nombre}_sum{{endpoint="{endpoint}"}} {histograma.suma}')
+                    lineas.append(f'{nombre}_count{{endpoint="{endpoint}"}} {histograma.cuenta}')
+            for nombre, clave, ayuda in (
+                ('http_db_segundos_total', 'db', 'Tiempo acumulado ejecutando SQL.'),
+                ('http_plantilla_segundos_total', 'plantilla', 'Tiempo acumulado renderizando plantillas.'),
+            ):
+                lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} counter']
+                for endpoint, ruta in sorted(self._rutas.items()):
+                    lineas.append(f'{nombre}{{endpoint="{endpoint}"}} {ruta[clave]}')
+        lineas.extend(extra)
+        return '\n'.join(lineas) + '\n'
+
+
+def _medicion():
+    medicion = g.get('_medicion')
+    if medicion is None:
+        medicion = g._medicion = {'inicio': time.perf_counter(), 'consultas': 0, 'db': 0.0, 'plantilla': 0.0}
+    return medicion
+
+
+def instrumentar(app, motores, registro):
+    """Engancha los eventos de SQLAlchemy y las señales de Flask.
+
+    Con app.debug o METRICAS_CABECERA cada respuesta lleva X-Consultas-SQL y
+    Server-Timing con los tiempos de la petición.
+    """
+
+    def antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_inicios_consulta', []).append(time.perf_counter())
+
+    def despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+        inicios = conn.info.get('_inicios_consulta')
+        if not inicios:
+            return
+        duracion = time.perf_counter() - inicios.pop()
+        if has_request_context():
+            medicion = _medicion()
+            medicion['consultas'] += 1
+            medicion['db'] += duracion
+
+    for motor in motores:
+        event.listen(motor, 'before_cursor_execute', antes_de_consulta)
+        event.listen(motor, 'after_cursor_execute', despues_de_consulta)
+
+    def al_iniciar(sender, **extra):
+        _medicion()
+
+    def antes_de_plantilla(sender, template, context, **extra):
+        g._inicio_plantilla = time.perf_counter()
+
+    def plantilla_lista(sender, template, context, **extra):
+        inicio = g.pop('_inicio_plantilla', None)
+        if inicio is not None:
+            _medicion()['plantilla'] += time.perf_counter() - inicio
+
+    def al_terminar(sender, response, **extra):
+        medicion = _medicion()
+        total = time.perf_counter() - medicion['inicio']
+        registro.registrar(
+            request.endpoint or 'desconocido', request.method, response.status_code,
+            medicion['consultas'], medicion['db'], medicion['plantilla'], total
+        )
+        if sender.debug or sender.config.get('METRICAS_CABECERA'):
+            response.headers['X-Consultas-SQL'] = str(medicion['consultas'])
+            response.headers['Server-Timing'] = (
+                f"db;dur={medicion['db'] * 1000:.1f}, "
+                f"plantilla;dur={medicion['plantilla'] * 1000:.1f}, "
+                f"total;dur={total * 1000:.1f}"
+            )
+
+    # weak=False: las funciones locales desaparecerían al salir de instrumentar().
+    request_started.connect(al_iniciar, app, weak=False)
+    before_render_template.connect(antes_de_plantilla, app, weak=False)
+    template_rendered.connect(plantilla_lista, app, weak=False)
+    request_finished.connect(al_terminar, app, weak=False)
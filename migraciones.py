@@ -0,0 +1,225 @@
+import json
+import zlib
+from datetime import datetime
+
+import sqlalchemy as sa
+
+# Migraciones de esquema versionadas.
+#
+# db.create_all() crea las tablas que faltan, pero no toca las que ya existen:
+# los índices y restricciones añadidos después a los modelos solo llegan a una
+# base existente a través de estas migraciones. Cada paso es idempotente (si el
+# índice ya existe, con ese nombre o sobre las mismas columnas, se salta), así
+# que una base recién creada con create_all solo registra las versiones.
+#
+# Los índices se crean sin bloquear escrituras: CREATE INDEX CONCURRENTLY en
+# PostgreSQL (fuera de transacción) y ALGORITHM=INPLACE, LOCK=NONE en MySQL.
+# Si una migración falla a medias no se registra y se puede volver a lanzar.
+
+tabla_migraciones = sa.Table(
+    'esquema_migraciones', sa.MetaData(),
+    sa.Column('version', sa.Integer, primary_key=True),
+    sa.Column('descripcion', sa.String(200), nullable=False),
+    sa.Column('aplicada', sa.DateTime, nullable=False),
+)
+
+# Clave del pg_advisory_lock que evita que dos procesos migren a la vez.
+CLAVE_BLOQUEO = zlib.crc32(b'esquema_migraciones')
+
+
+class CrearIndice:
+    def __init__(self, nombre, tabla, columnas, unico=False):
+        self.nombre = nombre
+        self.tabla = tabla
+        self.columnas = tuple(columnas)
+        self.unico = unico
+
+    def __str__(self):
+        tipo = 'índice único' if self.unico else 'índice'
+        return f"{tipo} {self.nombre} en {self.tabla}({', '.join(self.columnas)})"
+
+    def existe(self, conexion):
+        inspector = sa.inspect(conexion)
+        # En SQLite los UNIQUE declarados en la columna solo aparecen como índices automáticos.
+        opciones = {'include_auto_indexes': True} if conexion.dialect.name == 'sqlite' else {}
+        indices = inspector.get_indexes(self.tabla, **opciones)
+        existentes = [(i['name'], tuple(i['column_names']), bool(i.get('unique'))) for i in indices]
+        existentes += [(u['name'], tuple(u['column_names']), True) for u in inspector.get_unique_constraints(self.tabla)]
+        pk = inspector.get_pk_constraint(self.tabla)
+        existentes.append((pk.get('name'), tuple(pk.get('constrained_columns') or ()), True))
+        return any(
+            nombre == self.nombre or (columnas == self.columnas and (unico or not self.unico))
+            for nombre, columnas, unico in existentes
+        )
+
+    def aplicar(self, conexion):
+        dialecto = conexion.dialect.name
+        unico = 'UNIQUE ' if self.unico else ''
+        columnas = ', '.join(self.columnas)
+        if dialecto == 'postgresql':
+            # Un CREATE INDEX CONCURRENTLY interrumpido deja un índice inválido: se descarta y se repite.
+            invalido = conexion.execute(sa.text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :nombre AND NOT i.indisvalid"
+            ), {'nombre': self.nombre}).first()
+            if invalido:
+                conexion.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {self.nombre}"))
+            elif self.existe(conexion):
+                return False
+            conexion.execute(sa.text(f"CREATE {unico}INDEX CONCURRENTLY IF NOT EXISTS {self.nombre} ON {self.tabla} ({columnas})"))
+            return True
+        if self.existe(conexion):
+            return False
+        if dialecto == 'mysql':
+            conexion.execute(sa.text(f"CREATE {unico}INDEX {self.nombre} ON {self.tabla} ({columnas}) ALGORITHM=INPLACE LOCK=NONE"))
+        else:
+            conexion.execute(sa.text(f"CREATE {unico}INDEX IF NOT EXISTS {self.nombre} ON {self.tabla} ({columnas})"))
+        return True
+
+
+class Deduplicar:
+    """Borra filas repetidas en `columnas` antes de crear un índice único.
+
+    Se conserva la fila con mayor `mejor` (si se indica) y, a igualdad, la de menor id.
+    """
+
+    def __init__(self, tabla, columnas, mejor=None):
+        self.tabla = tabla
+        self.columnas = tuple(columnas)
+        self.mejor = mejor
+
+    def __str__(self):
+        return f"duplicados de {self.tabla}({', '.join(self.columnas)})"
+
+    def aplicar(self, conexion):
+        iguales = ' AND '.join(f"q.{c} = p.{c}" for c in self.columnas)
+        preferida = "q.id < p.id"
+        if self.mejor:
+            preferida = f"q.{self.mejor} > p.{self.mejor} OR (q.{self.mejor} = p.{self.mejor} AND q.id < p.id)"
+        # La subconsulta derivada (AS conservadas) es necesaria en MySQL, que no
+        # permite leer en un subselect la misma tabla de la que se borra.
+        resultado = conexion.execute(sa.text(
+            f"DELETE FROM {self.tabla} WHERE id NOT IN (SELECT id FROM ("
+            f"SELECT p.id FROM {self.tabla} p WHERE NOT EXISTS ("
+            f"SELECT 1 FROM {self.tabla} q WHERE {iguales} AND ({preferida}))"
+            f") AS conservadas)"
+        ))
+        return resultado.rowcount > 0
+
+
+class RellenarResumenes:
+    """Crea la fila de resumen_estudiantes de los estudiantes que aún no la tienen.
+
+    Mismo cálculo que calcular_resumen() en app.py: misiones activas por orden
+    de alta, las `destacadas` primeras con su progreso y el menor logro obtenido.
+    """
+
+    def __init__(self, destacadas, lote=1000):
+        self.destacadas = destacadas
+        self.lote = lote
+
+    def __str__(self):
+        return "resúmenes de estudiantes"
+
+    def aplicar(self, conexion):
+        faltan = [fila[0] for fila in conexion.execute(sa.text(
+            "SELECT e.id FROM estudiantes e WHERE NOT EXISTS "
+            "(SELECT 1 FROM resumen_estudiantes r WHERE r.estudiante_id = e.id) ORDER BY e.id"
+        ))]
+        for inicio in range(0, len(faltan), self.lote):
+            ids = faltan[inicio:inicio + self.lote]
+            parametros = {'ids': ids}
+            resumenes = {i: {'estudiante_id': i, 'activas': 0, 'destacadas': [], 'logro': None} for i in ids}
+            for estudiante_id, mision_id, progreso in conexion.execute(sa.text(
+                "SELECT estudiante_id, mision_id, progreso FROM progreso_misiones "
+                "WHERE estudiante_id IN :ids AND completada = :falso ORDER BY estudiante_id, id"
+            ).bindparams(sa.bindparam('ids', expanding=True)), dict(parametros, falso=False)):
+                resumen = resumenes[estudiante_id]
+                resumen['activas'] += 1
+                if len(resumen['destacadas']) < self.destacadas:
+                    resumen['destacadas'].append([mision_id, progreso or 0])
+            for estudiante_id, logro_id in conexion.execute(sa.text(
+                "SELECT estudiante_id, MIN(logro_id) FROM estudiante_logros "
+                "WHERE estudiante_id IN :ids GROUP BY estudiante_id"
+            ).bindparams(sa.bindparam('ids', expanding=True)), parametros):
+                resumenes[estudiante_id]['logro'] = logro_id
+            conexion.execute(sa.text(
+                "INSERT INTO resumen_estudiantes (estudiante_id, misiones_activas, misiones_destacadas, logro_destacado_id) "
+                "VALUES (:estudiante_id, :activas, :destacadas, :logro)"
+            ), [dict(r, destacadas=json.dumps(r['destacadas'])) for r in resumenes.values()])
+        return bool(faltan)
+
+
+class Migracion:
+    def __init__(self, version, descripcion, pasos):
+        self.version = version
+        self.descripcion = descripcion
+        self.pasos = pasos
+
+
+MIGRACIONES = [
+    Migracion(1, "Índices de claves foráneas, restricciones únicas e índice de historial", [
+        # inventario.estudiante_id y progreso_misiones.estudiante_id quedan
+        # cubiertos por las restricciones únicas, que empiezan por esa columna.
+        Deduplicar('inventario', ('estudiante_id', 'objeto_id')),
+        CrearIndice('uq_inventario_estudiante_objeto', 'inventario', ('estudiante_id', 'objeto_id'), unico=True),
+        CrearIndice('ix_inventario_objeto_id', 'inventario', ('objeto_id',)),
+        Deduplicar('progreso_misiones', ('estudiante_id', 'mision_id'), mejor='progreso'),
+        CrearIndice('uq_progreso_misiones_estudiante_mision', 'progreso_misiones', ('estudiante_id', 'mision_id'), unico=True),
+        CrearIndice('ix_progreso_misiones_mision_id', 'progreso_misiones', ('mision_id',)),
+        CrearIndice('ix_misiones_action_trigger', 'misiones', ('action_trigger',)),
+        CrearIndice('uq_misiones_tipo', 'misiones', ('tipo',), unico=True),
+        CrearIndice('uq_objetos_nombre', 'objetos', ('nombre',), unico=True),
+        CrearIndice('uq_logros_nombre', 'logros', ('nombre',), unico=True),
+        CrearIndice('uq_actividades_nombre', 'actividades', ('nombre',), unico=True),
+        CrearIndice('ix_estudiante_logros_logro_id', 'estudiante_logros', ('logro_id',)),
+        CrearIndice('ix_estudiante_actividades_completadas_actividad_id', 'estudiante_actividades_completadas', ('actividad_id',)),
+        CrearIndice('ix_estudiante_actividades_historial', 'estudiante_actividades_completadas',
+                    ('estudiante_id', 'fecha_completado', 'actividad_id')),
+    ]),
+    # La tabla la crea db.create_all(), que se ejecuta antes de migrar.
+    Migracion(2, "Resumen por estudiante para el panel", [
+        RellenarResumenes(destacadas=3),
+    ]),
+    Migracion(3, "Índice del ranking", [
+        CrearIndice('ix_estudiantes_puntos_xp', 'estudiantes', ('puntos', 'xp')),
+    ]),
+]
+
+
+def versiones_aplicadas(conexion):
+    tabla_migraciones.create(conexion, checkfirst=True)
+    return {fila.version for fila in conexion.execute(sa.select(tabla_migraciones.c.version))}
+
+
+def pendientes(motor):
+    with motor.begin() as conexion:
+        aplicadas = versiones_aplicadas(conexion)
+    return [m for m in MIGRACIONES if m.version not in aplicadas]
+
+
+def migrar(motor, eco=print):
+    """Aplica en orden las migraciones pendientes. Devuelve cuántas se aplicaron."""
+    with motor.connect() as conexion:
+        conexion = conexion.execution_options(isolation_level='AUTOCOMMIT')
+        postgres = conexion.dialect.name == 'postgresql'
+        if postgres:
+            conexion.execute(sa.text("SELECT pg_advisory_lock(:clave)"), {'clave': CLAVE_BLOQUEO})
+        try:
+            aplicadas = versiones_aplicadas(conexion)
+            total = 0
+            for migracion in MIGRACIONES:
+                if migracion.version in aplicadas:
+                    continue
+                eco(f"Migración {migracion.version}: {migracion.descripcion}")
+                for paso in migracion.pasos:
+                    cambio = paso.aplicar(conexion)
+                    eco(f"  {'aplicado' if cambio else 'sin cambios'}: {paso}")
+                conexion.execute(tabla_migraciones.insert().values(
+                    version=migracion.version, descripcion=migracion.descripcion, aplicada=datetime.now()
+                ))
+                total += 1
+            return total
+        finally:
+            if postgres:
+                conexion.execute(sa.text("SELECT pg_advisory_unlock(:clave)"), {'clave': CLAVE_BLOQUEO})
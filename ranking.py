@@ -0,0 +1,92 @@
+import bisect
+import threading
+import time
+
+# Tabla de clasificación en memoria, ordenada por (puntos desc, xp desc, id asc).
+# Se carga una vez desde la base de datos y luego se mantiene de forma
+# incremental: cada cambio de puntos/XP es una búsqueda binaria más una
+# inserción, y "mi posición" es una búsqueda binaria.
+
+
+def _clave(estudiante_id, puntos, xp):
+    return (-puntos, -xp, estudiante_id)
+
+
+class TablaClasificacion:
+    def __init__(self):
+        self._claves = []
+        self._datos = {}
+        self._cargada_en = None
+        self._lock = threading.Lock()
+
+    def expirada(self, ttl_segundos):
+        if self._cargada_en is None:
+            return True
+        return ttl_segundos is not None and time.monotonic() - self._cargada_en > ttl_segundos
+
+    def cargar(self, filas):
+        """Reconstruye la tabla a partir de filas (id, nombre, puntos, xp, avatar, marco)."""
+        datos = {fila[0]: (fila[1], fila[2] or 0, fila[3] or 0, fila[4], fila[5]) for fila in filas}
+        claves = sorted(_clave(eid, puntos, xp) for eid, (_, puntos, xp, _, _) in datos.items())
+        with self._lock:
+            self._datos = datos
+            self._claves = claves
+            self._cargada_en = time.monotonic()
+
+    def invalidar(self):
+        with self._lock:
+            self._cargada_en = None
+
+    def actualizar(self, estudiante_id, nombre, puntos, xp, avatar=None, marco=None):
+        if self._cargada_en is None:
+            return
+        with self._lock:
+            self._quitar(estudiante_id)
+            self._datos[estudiante_id] = (nombre, puntos, xp, avatar, marco)
+            bisect.insort(self._claves, _clave(estudiante_id, puntos, xp))
+
+    def eliminar(self, estudiante_id):
+        with self._lock:
+            self._quitar(estudiante_id)
+            self._datos.pop(estudiante_id, None)
+
+    def _quitar(self, estudiante_id):
+        anterior = self._datos.get(estudiante_id)
+        if anterior is None:
+            return
+        clave = _clave(estudiante_id, anterior[1], anterior[2])
+        i = bisect.bisect_left(self._claves, clave)
+        if i < len(self._claves) and self._claves[i] == clave:
+            del self._claves[i]
+
+    def total(self):
+        return len(self._claves)
+
+    def posicion(self, estudiante_id):
+        """Posición (1 = primero) del estudiante, o None si no está en la tabla."""
+        with self._lock:
+            datos = self._datos.get(estudiante_id)
+            if datos is None:
+                return None
+            return bisect.bisect_left(self._claves, _clave(estudiante_id, datos[1], datos[2])) + 1
+
+    def _filas(self, inicio, limite):
+        filas = []
+        for i, (_, _, estudiante_id) in enumerate(self._claves[inicio:inicio + limite], start=inicio + 1):
+            nombre, puntos, xp, avatar, marco = self._datos[estudiante_id]
+            filas.append({'posicion': i, 'id': estudiante_id, 'nombre': nombre, 'puntos': puntos, 'xp': xp,
+                          'avatar': avatar, 'marco': marco})
+        return filas
+
+    def pagina(self, numero, tamano):
+        with self._lock:
+            return self._filas((numero - 1) * tamano, tamano)
+
+    def despues_de(self, cursor, limite):
+        """Paginación por cursor: filas estrictamente posteriores a (puntos, xp, id)."""
+        with self._lock:
+            inicio = 0
+            if cursor is not None:
+                puntos, xp, estudiante_id = cursor
+                inicio = bisect.bisect_right(self._claves, _clave(estudiante_id, puntos, xp))
+            return self._filas(inicio, limite)
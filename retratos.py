@@ -0,0 +1,180 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from PIL import Image, ImageChops, ImageDraw, ImageOps
+
+# Retratos compuestos: el marco de fondo y el avatar recortado en círculo con
+# su borde blanco, igual que .avatar-container/.avatar-menu en el CSS, pero en
+# una sola imagen. Se guardan en disco con el hash del contenido de ambas
+# imágenes como nombre, así que cambiar un archivo genera otro retrato y los
+# existentes se pueden cachear como inmutables. La carpeta tiene un tamaño
+# máximo: al superarlo se borran los menos usados (LRU por fecha de acceso).
+#
+# Para el ranking se pueden pegar todos los retratos de una página en una hoja
+# de sprites: una sola imagen que el CSS recorta con background-position.
+
+VERSION = 1  # cambiarla invalida todos los retratos generados
+CALIDAD_WEBP = 85
+BORDE = 3 / 100  # 3px de borde en un avatar de 100px
+COLUMNAS_SPRITES = 10
+
+
+@lru_cache(maxsize=1024)
+def _huella(ruta, mtime_ns, tamano):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for trozo in iter(lambda: f.read(1 << 16), b''):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def huella_archivo(ruta):
+    """sha256 del contenido; solo se recalcula si cambian la fecha o el tamaño del archivo."""
+    estado = os.stat(ruta)
+    return _huella(ruta, estado.st_mtime_ns, estado.st_size)
+
+
+def clave_retrato(ruta_avatar, ruta_marco, lado):
+    partes = [str(VERSION), str(lado), huella_archivo(ruta_avatar), huella_archivo(ruta_marco) if ruta_marco else '-']
+    return hashlib.sha256(':'.join(partes).encode()).hexdigest()[:32]
+
+
+def clave_hoja(claves, lado):
+    return hashlib.sha256(f"{VERSION}:{lado}:{','.join(claves)}".encode()).hexdigest()[:32]
+
+
+def componer(ruta_avatar, ruta_marco, lado):
+    """Imagen RGBA de `lado` x `lado` con el marco de fondo y el avatar en círculo."""
+    retrato = Image.new('RGBA', (lado, lado), (0, 0, 0, 0))
+    if ruta_marco:
+        with Image.open(ruta_marco) as marco:
+            # background-size: cover; background-position: center
+            retrato.alpha_composite(ImageOps.fit(marco.convert('RGBA'), (lado, lado), Image.LANCZOS))
+
+    # El <img> ocupa el 100% del contenedor (se estira, sin recortar).
+    with Image.open(ruta_avatar) as avatar:
+        avatar = ImageOps.exif_transpose(avatar).convert('RGBA').resize((lado, lado), Image.LANCZOS)
+    escala = 4  # máscara a mayor tamaño para suavizar el borde del círculo
+    borde = max(1, round(lado * BORDE)) * escala
+    circulo = Image.new('L', (lado * escala, lado * escala), 0)
+    ImageDraw.Draw(circulo).ellipse((0, 0, lado * escala - 1, lado * escala - 1), fill=255)
+    interior = Image.new('L', circulo.size, 0)
+    ImageDraw.Draw(interior).ellipse((borde, borde, lado * escala - 1 - borde, lado * escala - 1 - borde), fill=255)
+    circulo = circulo.resize((lado, lado), Image.LANCZOS)
+    interior = interior.resize((lado, lado), Image.LANCZOS)
+
+    blanco = Image.new('RGBA', (lado, lado), (255, 255, 255, 255))
+    blanco.putalpha(circulo)
+    retrato.alpha_composite(blanco)
+    avatar.putalpha(ImageChops.multiply(avatar.getchannel('A'), interior))
+    retrato.alpha_composite(avatar)
+    return retrato
+
+
+def hoja_sprites(rutas, lado):
+    """Pega los retratos de `rutas` en una rejilla de COLUMNAS_SPRITES columnas."""
+    columnas = min(COLUMNAS_SPRITES, len(rutas)) or 1
+    filas = -(-len(rutas) // columnas) or 1
+    hoja = Image.new('RGBA', (columnas * lado, filas * lado), (0, 0, 0, 0))
+    for i, ruta in enumerate(rutas):
+        with Image.open(ruta) as retrato:
+            hoja.paste(retrato.convert('RGBA'), ((i % columnas) * lado, (i // columnas) * lado))
+    return hoja
+
+
+def posicion_sprite(indice, lado):
+    """(x, y) en píxeles del sprite `indice` dentro de la hoja."""
+    return (indice % COLUMNAS_SPRITES) * lado, (indice // COLUMNAS_SPRITES) * lado
+
+
+def a_webp(imagen):
+    salida = io.BytesIO()
+    imagen.save(salida, 'WEBP', quality=CALIDAD_WEBP, method=4)
+    return salida.getvalue()
+
+
+class CacheDisco:
+    """Archivos generados en `carpeta`, con LRU por tamaño total.
+
+    El orden de uso se guarda también en la fecha de modificación de cada
+    archivo (se toca en cada acierto), así sobrevive a reinicios y los
+    distintos workers que comparten la carpeta ven aproximadamente el mismo.
+    """
+
+    def __init__(self, carpeta, max_bytes, extension='.webp'):
+        self.carpeta = carpeta
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self._archivos = None
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def _cargar(self):
+        os.makedirs(self.carpeta, exist_ok=True)
+        archivos = []
+        for entrada in os.scandir(self.carpeta):
+            if entrada.is_file() and entrada.name.endswith(self.extension):
+                estado = entrada.stat()
+                archivos.append((estado.st_mtime, entrada.name[:-len(self.extension)], estado.st_size))
+        self._archivos = OrderedDict((clave, tamano) for _, clave, tamano in sorted(archivos))
+        self._total = sum(self._archivos.values())
+
+    def ruta(self, clave):
+        return os.path.join(self.carpeta, clave + self.extension)
+
+    def obtener(self, clave, generar):
+        """Ruta del archivo de `clave`; si no existe lo crea con generar() -> bytes."""
+        ruta = self.ruta(clave)
+        with self._lock:
+            if self._archivos is None:
+                self._cargar()
+            if clave in self._archivos:
+                try:
+                    os.utime(ruta)
+                    self._archivos.move_to_end(clave)
+                    return ruta
+                except FileNotFoundError:
+                    # Lo borró otro worker al hacer sitio.
+                    self._total -= self._archivos.pop(clave)
+            elif os.path.isfile(ruta):
+                # Lo generó otro worker después de leer la carpeta.
+                os.utime(ruta)
+                self._archivos[clave] = os.path.getsize(ruta)
+                self._total += self._archivos[clave]
+                return ruta
+
+        contenido = generar()
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, 'wb') as f:
+            f.write(contenido)
+        os.replace(temporal, ruta)
+
+        with self._lock:
+            if clave not in self._archivos:
+                self._archivos[clave] = len(contenido)
+                self._total += len(contenido)
+            self._expulsar(conservar=clave)
+        return ruta
+
+    def _expulsar(self, conservar):
+        while self._total > self.max_bytes and len(self._archivos) > 1:
+            clave, tamano = next(iter(self._archivos.items()))
+            if clave == conservar:
+                self._archivos.move_to_end(clave)
+                continue
+            del self._archivos[clave]
+            self._total -= tamano
+            try:
+                os.remove(self.ruta(clave))
+            except FileNotFoundError:
+                pass
+
+    def uso(self):
+        with self._lock:
+            if self._archivos is None:
+                self._cargar()
+            return {'archivos': len(self._archivos), 'bytes': self._total, 'max_bytes': self.max_bytes}
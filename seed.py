@@ -1,11 +1,293 @@
-# Al inicio de seed.py
-from app import app, db, Estudiante, Objeto, Mision, ProgresoMision, Logro, Juego
-
-# Dentro de with app.app_context():
-    # ...
-    juegos_a_crear = [
-        Juego(nombre='Memoria', emoji='🧠', endpoint='memoria'),
-        Juego(nombre='Tic Tac Toe', emoji='❌⭕', endpoint='tictactoe_volver_menu')
-    ]
-    db.session.add_all(juegos_a_crear)
-    # ...
\ No newline at end of file
+"""Siembra masiva de estudiantes para entornos de carga y staging.
+
+Genera estudiantes sintéticos o los importa desde CSV/JSONL, con su
+inventario, progreso de misiones, historial de actividades y los logros de
+nivel que corresponden a su XP. Inserta por
+lotes: COPY en PostgreSQL (psycopg2) y executemany en el resto de motores.
+Los hashes de contraseña se calculan una vez por contraseña distinta y se
+reutilizan. Los ids de estudiante se asignan aquí para poder insertar las
+tablas hijas en el mismo lote, así que no debe haber altas concurrentes
+mientras corre.
+
+Uso (desde la raíz del repositorio, con DATABASE_URL apuntando a la base):
+    python seed.py generar --estudiantes 200000 [--semilla 1] [--lote 5000]
+    python seed.py importar estudiantes.jsonl [--lote 5000]
+
+Formato de importación (una fila por estudiante):
+    JSONL: {"nombre", "email", "password" o "password_hash", "puntos", "xp",
+            "avatar", "marco", "inventario": [nombre de objeto, ...],
+            "misiones": {tipo: progreso, ...},
+            "actividades": [{"nombre": ..., "fecha": ISO 8601}, ...]}
+    CSV:   mismas columnas; inventario y actividades separadas por "|",
+           misiones como "tipo=progreso|tipo=progreso".
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from app import (app, db, Estudiante, Inventario, ProgresoMision, EstudianteActividadCompletada, ResumenEstudiante,
+                 Objeto, Mision, Actividad, Logro, estudiante_logros, hasher, calcular_nivel_para_xp,
+                 sincronizar_catalogos, RESUMEN_MISIONES_DESTACADAS)
+
+COLUMNAS_ESTUDIANTE = ('id', 'nombre', 'email', 'password_hash', 'puntos', 'xp', 'nivel', 'avatar_personal', 'marco_personal')
+COLUMNAS_INVENTARIO = ('estudiante_id', 'objeto_id')
+COLUMNAS_PROGRESO = ('estudiante_id', 'mision_id', 'progreso', 'completada')
+COLUMNAS_ACTIVIDAD = ('estudiante_id', 'actividad_id', 'fecha_completado')
+COLUMNAS_LOGRO = ('estudiante_id', 'logro_id')
+COLUMNAS_RESUMEN = ('estudiante_id', 'misiones_activas', 'misiones_destacadas', 'logro_destacado_id')
+AVATAR_POR_DEFECTO = 'avatar-1.png'
+MARCO_POR_DEFECTO = 'marco_amarillo.png'
+
+
+# --- ORÍGENES DE DATOS ---
+
+def generar(cantidad, semilla, password, objetos, misiones, actividades):
+    azar = random.Random(semilla)
+    nombres_objetos = list(objetos)
+    ahora = datetime.now()
+    prefijo = f"seed{semilla}"
+    for i in range(cantidad):
+        inventario = azar.sample(nombres_objetos, azar.randint(0, min(4, len(nombres_objetos))))
+        yield {
+            'nombre': f"{prefijo}_{i}",
+            'email': f"{prefijo}_{i}@seed.local",
+            'password': password,
+            'puntos': azar.randint(0, 2000),
+            'xp': azar.randint(0, 5000),
+            'inventario': inventario,
+            'misiones': {tipo: azar.randint(0, meta) for tipo, (_, meta) in misiones.items() if azar.random() < 0.5},
+            'actividades': [
+                {'nombre': nombre, 'fecha': ahora - timedelta(minutes=azar.randint(0, 180 * 24 * 60))}
+                for nombre in azar.sample(list(actividades), azar.randint(0, len(actividades)))
+            ],
+        }
+
+
+def leer_jsonl(archivo):
+    for numero, linea in enumerate(archivo, start=1):
+        if linea.strip():
+            try:
+                yield json.loads(linea)
+            except ValueError as e:
+                raise SystemExit(f"Línea {numero}: JSON inválido ({e})")
+
+
+def _lista(valor):
+    return [parte.strip() for parte in (valor or '').split('|') if parte.strip()]
+
+
+def leer_csv(archivo):
+    for fila in csv.DictReader(archivo):
+        misiones = {}
+        for parte in _lista(fila.get('misiones')):
+            tipo, _, progreso = parte.partition('=')
+            misiones[tipo] = int(progreso or 0)
+        yield dict(
+            fila,
+            inventario=_lista(fila.get('inventario')),
+            misiones=misiones,
+            actividades=[{'nombre': nombre} for nombre in _lista(fila.get('actividades'))],
+        )
+
+
+# --- ESCRITURA POR LOTES ---
+
+def insertar(conexion, tabla, columnas, filas):
+    if not filas:
+        return
+    if conexion.dialect.name == 'postgresql':
+        cursor = conexion.connection.cursor()
+        if hasattr(cursor, 'copy_expert'):
+            # En CSV de COPY un campo vacío sin comillas es NULL; las listas van como JSON.
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(
+                [json.dumps(valor) if isinstance(valor, list) else valor for valor in fila] for fila in filas
+            )
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {tabla.name} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            return
+    conexion.execute(tabla.insert(), [dict(zip(columnas, fila)) for fila in filas])
+
+
+def _fecha(valor, por_defecto):
+    if isinstance(valor, datetime):
+        return valor
+    return datetime.fromisoformat(valor) if valor else por_defecto
+
+
+class Sembrador:
+    def __init__(self, motor, lote):
+        self.motor = motor
+        self.lote = lote
+        self.hashes = {}
+        self.estudiantes = self.filas = self.omitidos = 0
+        self.desconocidos = set()
+        with motor.connect() as conexion:
+            self.objetos = {nombre: (id_, imagen) for id_, nombre, imagen in conexion.execute(
+                sa.select(Objeto.id, Objeto.nombre, Objeto.imagen_url))}
+            self.misiones = {tipo: (id_, meta) for id_, tipo, meta in conexion.execute(
+                sa.select(Mision.id, Mision.tipo, Mision.meta))}
+            self.actividades = dict(conexion.execute(sa.select(Actividad.nombre, Actividad.id)).all())
+            self.logros = conexion.execute(sa.select(
+                Logro.id, sa.func.coalesce(Logro.nivel_requerido, 1)
+            ).order_by(Logro.id)).all()
+            self.siguiente_id = (conexion.scalar(sa.select(sa.func.max(Estudiante.id))) or 0) + 1
+
+    def hash_de(self, datos):
+        if datos.get('password_hash'):
+            return datos['password_hash']
+        password = datos.get('password')
+        if not password:
+            raise SystemExit(f"El estudiante {datos.get('email')} no tiene password ni password_hash.")
+        if password not in self.hashes:
+            self.hashes[password] = hasher.generar(password)
+        return self.hashes[password]
+
+    def _id_catalogo(self, tipo, catalogo, nombre):
+        valor = catalogo.get(nombre)
+        if valor is None:
+            self.desconocidos.add(f"{tipo} '{nombre}'")
+        return valor
+
+    def escribir_lote(self, lote):
+        ahora = datetime.now()
+        with self.motor.begin() as conexion:
+            # Los que ya existen (por email o nombre) se saltan en vez de abortar el lote.
+            emails = [datos['email'] for datos in lote]
+            nombres = [datos['nombre'] for datos in lote]
+            existentes = set(conexion.scalars(sa.select(Estudiante.email).where(Estudiante.email.in_(emails))))
+            existentes |= set(conexion.scalars(sa.select(Estudiante.nombre).where(Estudiante.nombre.in_(nombres))))
+
+            estudiantes, inventario, progreso, actividades, logros, resumenes = [], [], [], [], [], []
+            vistos = set()
+            for datos in lote:
+                if datos['email'] in existentes or datos['nombre'] in existentes \
+                        or datos['email'] in vistos or datos['nombre'] in vistos:
+                    self.omitidos += 1
+                    continue
+                vistos.update((datos['email'], datos['nombre']))
+                estudiante_id = self.siguiente_id
+                self.siguiente_id += 1
+                xp = int(datos.get('xp') or 0)
+
+                avatar, marco = datos.get('avatar'), datos.get('marco')
+                for nombre in dict.fromkeys(datos.get('inventario') or ()):
+                    objeto = self._id_catalogo('objeto', self.objetos, nombre)
+                    if objeto is None:
+                        continue
+                    objeto_id, imagen = objeto
+                    inventario.append((estudiante_id, objeto_id))
+                    # Sin avatar/marco explícito se equipa el último comprado.
+                    if imagen and imagen.startswith('avatares/') and not datos.get('avatar'):
+                        avatar = os.path.basename(imagen)
+                    elif imagen and imagen.startswith('marcos/') and not datos.get('marco'):
+                        marco = os.path.basename(imagen)
+
+                nivel = calcular_nivel_para_xp(xp)
+                estudiantes.append((
+                    estudiante_id, datos['nombre'], datos['email'], self.hash_de(datos),
+                    int(datos.get('puntos') or 0), xp, nivel,
+                    avatar or AVATAR_POR_DEFECTO, marco or MARCO_POR_DEFECTO,
+                ))
+                # Los mismos logros que verificar_y_asignar_logros() daría a ese nivel.
+                obtenidos = [logro_id for logro_id, nivel_requerido in self.logros if nivel_requerido <= nivel]
+                logros.extend((estudiante_id, logro_id) for logro_id in obtenidos)
+                activas = []
+                for tipo, avance in (datos.get('misiones') or {}).items():
+                    mision = self._id_catalogo('misión', self.misiones, tipo)
+                    if mision is not None:
+                        mision_id, meta = mision
+                        avance = min(int(avance), meta)
+                        progreso.append((estudiante_id, mision_id, avance, avance >= meta))
+                        if avance < meta:
+                            activas.append([mision_id, avance])
+                # El resumen del panel sigue el orden de alta del progreso, que aquí es el de inserción.
+                resumenes.append((estudiante_id, len(activas), activas[:RESUMEN_MISIONES_DESTACADAS],
+                                  obtenidos[0] if obtenidos else None))
+                for actividad in datos.get('actividades') or ():
+                    actividad_id = self._id_catalogo('actividad', self.actividades, actividad['nombre'])
+                    if actividad_id is not None:
+                        actividades.append((estudiante_id, actividad_id, _fecha(actividad.get('fecha'), ahora)))
+
+            insertar(conexion, Estudiante.__table__, COLUMNAS_ESTUDIANTE, estudiantes)
+            insertar(conexion, Inventario.__table__, COLUMNAS_INVENTARIO, inventario)
+            insertar(conexion, ProgresoMision.__table__, COLUMNAS_PROGRESO, progreso)
+            insertar(conexion, EstudianteActividadCompletada.__table__, COLUMNAS_ACTIVIDAD, actividades)
+            insertar(conexion, estudiante_logros, COLUMNAS_LOGRO, logros)
+            insertar(conexion, ResumenEstudiante.__table__, COLUMNAS_RESUMEN, resumenes)
+
+        self.estudiantes += len(estudiantes)
+        self.filas += len(estudiantes) + len(inventario) + len(progreso) + len(actividades) + len(logros) + len(resumenes)
+
+    def ejecutar(self, origen):
+        inicio = time.perf_counter()
+        lote = []
+
+        def informar():
+            segundos = max(time.perf_counter() - inicio, 1e-9)
+            print(f"{self.estudiantes} estudiantes, {self.filas} filas en {segundos:.1f} s "
+                  f"({self.estudiantes / segundos:.0f} estudiantes/s, {self.filas / segundos:.0f} filas/s)", flush=True)
+
+        for datos in origen:
+            lote.append(datos)
+            if len(lote) >= self.lote:
+                self.escribir_lote(lote)
+                lote = []
+                informar()
+        if lote:
+            self.escribir_lote(lote)
+            informar()
+
+        if self.motor.dialect.name == 'postgresql':
+            # Los ids se asignaron a mano: la secuencia tiene que seguir desde el último.
+            with self.motor.begin() as conexion:
+                conexion.execute(sa.text(
+                    "SELECT setval(pg_get_serial_sequence('estudiantes', 'id'), "
+                    "(SELECT COALESCE(MAX(id), 1) FROM estudiantes))"
+                ))
+        if self.omitidos:
+            print(f"{self.omitidos} estudiantes omitidos porque su email o nombre ya existía.")
+        if self.desconocidos:
+            print(f"Aviso: se ignoraron referencias desconocidas: {', '.join(sorted(self.desconocidos))}")
+
+
+def main():
+    # Opciones comunes, en cada subcomando: `seed.py generar --lote 1000`.
+    comunes = argparse.ArgumentParser(add_help=False)
+    comunes.add_argument('--lote', type=int, default=5000, help='Estudiantes por transacción.')
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    generar_parser = subcomandos.add_parser('generar', parents=[comunes], help='Crea estudiantes sintéticos.')
+    generar_parser.add_argument('--estudiantes', type=int, default=10000)
+    generar_parser.add_argument('--semilla', type=int, default=1, help='También distingue los nombres entre ejecuciones.')
+    generar_parser.add_argument('--password', default='estudiante123', help='Contraseña de todos los estudiantes generados.')
+    importar_parser = subcomandos.add_parser('importar', parents=[comunes], help='Importa estudiantes desde CSV o JSONL.')
+    importar_parser.add_argument('archivo', help='Ruta al archivo (.csv o .jsonl); "-" para JSONL por stdin.')
+    argumentos = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        sincronizar_catalogos()
+        sembrador = Sembrador(db.engine, argumentos.lote)
+
+        if argumentos.comando == 'generar':
+            sembrador.ejecutar(generar(argumentos.estudiantes, argumentos.semilla, argumentos.password,
+                                       sembrador.objetos, sembrador.misiones, sembrador.actividades))
+        elif argumentos.archivo == '-':
+            sembrador.ejecutar(leer_jsonl(sys.stdin))
+        else:
+            with open(argumentos.archivo, encoding='utf-8-sig', newline='') as archivo:
+                lector = leer_csv if argumentos.archivo.lower().endswith('.csv') else leer_jsonl
+                sembrador.ejecutar(lector(archivo))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+// Eventos en vivo del estudiante.
+// Actualiza los elementos marcados con data-vivo (puntos, XP, nivel) y el
+// progreso de las misiones de la barra lateral, y muestra los avisos de nivel,
+// logros y misiones completadas sin recargar la página.
+// Con data-url escucha los server-sent events de /eventos (el navegador vuelve
+// a conectarse solo si se corta el flujo); con data-sondeo consulta
+// /api/estado cada data-intervalo ms mientras la pestaña está visible y justo
+// después de enviar resultados de juego.
+(function () {
+    const datosScript = document.currentScript.dataset;
+    const DURACION_AVISO_MS = 4000;
+
+    function fijar(campo, valor) {
+        document.querySelectorAll('[data-vivo="' + campo + '"]').forEach(elemento => {
+            elemento.textContent = valor;
+        });
+    }
+
+    function avisar(datos) {
+        const contenedor = document.getElementById('flash-container');
+        if (!datos.mensaje || !contenedor) {
+            return;
+        }
+        const alerta = document.createElement('div');
+        alerta.className = 'alert alert-' + (datos.categoria || 'info');
+        alerta.textContent = datos.mensaje;
+        contenedor.appendChild(alerta);
+        contenedor.style.display = '';
+        contenedor.style.opacity = '1';
+        setTimeout(() => alerta.remove(), DURACION_AVISO_MS);
+    }
+
+    function billetera(datos) {
+        ['puntos', 'xp', 'nivel', 'xp_siguiente_nivel', 'xp_restante'].forEach(campo => fijar(campo, datos[campo]));
+        document.querySelectorAll('[data-vivo="progreso_xp"]').forEach(barra => {
+            barra.style.width = datos.progreso_xp + '%';
+        });
+        document.dispatchEvent(new CustomEvent('billetera', { detail: datos }));
+    }
+
+    function mision(datos) {
+        const tarjeta = document.querySelector('[data-mision="' + datos.id + '"]');
+        if (tarjeta) {
+            if (datos.completada) {
+                tarjeta.remove();
+                const conteo = document.querySelector('.mision-conteo');
+                if (conteo) {
+                    conteo.textContent = Math.max(0, parseInt(conteo.textContent, 10) - 1);
+                }
+            } else {
+                tarjeta.querySelector('.mision-progreso').textContent = datos.progreso;
+                tarjeta.querySelector('.progreso-barra-interna').style.width =
+                    Math.floor(datos.progreso / datos.meta * 100) + '%';
+            }
+        }
+        avisar(datos);
+    }
+
+    function escuchar(url) {
+        const fuente = new EventSource(url);
+        const leer = evento => JSON.parse(evento.data);
+        fuente.addEventListener('billetera', evento => billetera(leer(evento)));
+        fuente.addEventListener('mision', evento => mision(leer(evento)));
+        fuente.addEventListener('nivel', evento => avisar(leer(evento)));
+        fuente.addEventListener('logro', evento => avisar(leer(evento)));
+    }
+
+    function sondear(url, intervalo) {
+        let consultando = false;
+
+        function consultar() {
+            if (consultando || document.hidden) {
+                return;
+            }
+            consultando = true;
+            fetch(url, { headers: { 'Accept': 'application/json' } })
+                .then(response => response.ok ? response.json() : null)
+                .then(datos => {
+                    if (!datos || datos.status !== 'ok') {
+                        return;
+                    }
+                    billetera(datos.billetera);
+                    // Una tarjeta que ya no está entre las activas es una misión completada.
+                    const activas = new Map(datos.misiones.map(m => [String(m.id), m]));
+                    document.querySelectorAll('[data-mision]').forEach(tarjeta => {
+                        mision(activas.get(tarjeta.dataset.mision) || { id: tarjeta.dataset.mision, completada: true });
+                    });
+                    datos.avisos.forEach(avisar);
+                })
+                .catch(error => console.error('Error al consultar el estado:', error))
+                .finally(() => {
+                    consultando = false;
+                });
+        }
+
+        setInterval(consultar, intervalo);
+        document.addEventListener('visibilitychange', consultar);
+        document.addEventListener('resultados-enviados', consultar);
+    }
+
+    if (datosScript.url && window.EventSource) {
+        escuchar(datosScript.url);
+    } else if (datosScript.sondeo) {
+        sondear(datosScript.sondeo, parseInt(datosScript.intervalo, 10) || 30000);
+    }
+})();
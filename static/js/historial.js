@@ -0,0 +1,75 @@
+// Scroll infinito del historial de actividades.
+// La página trae la primera tanda y un enlace "Cargar más" con el cursor de la
+// siguiente (sin JavaScript el enlace abre esa página). Aquí el enlace se
+// sustituye por peticiones a /api/historial_actividades cuando llega a la vista.
+(function () {
+    const enlace = document.getElementById('historial-mas');
+    const lista = document.getElementById('historial-lista');
+    if (!enlace || !lista) {
+        return;
+    }
+    const url = enlace.dataset.url;
+    let siguiente = enlace.dataset.siguiente;
+    let cargando = false;
+    let observador = null;
+
+    function crear(etiqueta, texto) {
+        const elemento = document.createElement(etiqueta);
+        elemento.textContent = texto;
+        return elemento;
+    }
+
+    function tarjeta(fila) {
+        const card = document.createElement('div');
+        card.className = 'historial-card';
+        card.appendChild(crear('h3', fila.nombre));
+        card.appendChild(crear('p', fila.descripcion || ''));
+        const detalles = document.createElement('div');
+        detalles.className = 'historial-details';
+        detalles.appendChild(crear('span', 'Puntos Ganados: ' + fila.puntos_recompensa));
+        detalles.appendChild(crear('span', 'Fecha: ' + (fila.fecha_texto || '-')));
+        card.appendChild(detalles);
+        return card;
+    }
+
+    function cargar() {
+        if (cargando || !siguiente) {
+            return;
+        }
+        cargando = true;
+        fetch(url + '?despues=' + encodeURIComponent(siguiente))
+            .then(response => response.json())
+            .then(data => {
+                if (data.status !== 'ok') {
+                    throw new Error(data.message || 'Error al cargar el historial');
+                }
+                data.historial.forEach(fila => lista.appendChild(tarjeta(fila)));
+                siguiente = data.siguiente;
+                if (!siguiente) {
+                    enlace.remove();
+                } else if (observador) {
+                    // Si el enlace sigue a la vista, volver a observarlo dispara otra carga.
+                    observador.unobserve(enlace);
+                    observador.observe(enlace);
+                }
+            })
+            .catch(error => console.error('Error al cargar el historial:', error))
+            .finally(() => {
+                cargando = false;
+            });
+    }
+
+    enlace.addEventListener('click', function (evento) {
+        evento.preventDefault();
+        cargar();
+    });
+
+    if ('IntersectionObserver' in window) {
+        observador = new IntersectionObserver(entradas => {
+            if (entradas.some(entrada => entrada.isIntersecting)) {
+                cargar();
+            }
+        }, { rootMargin: '200px' });
+        observador.observe(enlace);
+    }
+})();
@@ -0,0 +1,97 @@
+// Cola de resultados de juego.
+// Cada partida recibe una clave de idempotencia y se envía en lote a
+// /juego/resultados. La cola vive en localStorage: si la petición falla o la
+// página se recarga, se reintenta con las mismas claves y el servidor descarta
+// las que ya había procesado. Hay una cola por estudiante (data-estudiante),
+// para que otro estudiante en el mismo navegador no envíe partidas ajenas.
+(function () {
+    const CLAVE_COLA = 'resultados_pendientes:' + document.currentScript.dataset.estudiante;
+    const ESPERA_MS = 1000;
+    const ESPERA_MAX_MS = 30000;
+    const MAX_LOTE = 50;
+    const url = document.currentScript.dataset.url;
+
+    let temporizador = null;
+    let enviando = false;
+    let espera = ESPERA_MS;
+
+    function leerCola() {
+        try {
+            return JSON.parse(localStorage.getItem(CLAVE_COLA)) || [];
+        } catch (e) {
+            return [];
+        }
+    }
+
+    function guardarCola(cola) {
+        localStorage.setItem(CLAVE_COLA, JSON.stringify(cola));
+    }
+
+    function nuevaClave() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+
+    function programar() {
+        if (!temporizador) {
+            temporizador = setTimeout(enviar, espera);
+        }
+    }
+
+    function enviar() {
+        temporizador = null;
+        const lote = leerCola().slice(0, MAX_LOTE);
+        if (enviando || lote.length === 0) {
+            return;
+        }
+        enviando = true;
+
+        fetch(url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ resultados: lote }),
+            keepalive: true
+        }).then(response => response.json().then(data => ({ ok: response.ok, data: data })))
+          .then(({ ok, data }) => {
+              if (!ok || data.status !== 'ok') {
+                  throw new Error(data.message || 'Error al enviar resultados');
+              }
+              const procesadas = new Set([...data.aceptados, ...data.duplicados, ...data.rechazados]);
+              guardarCola(leerCola().filter(r => !procesadas.has(r.clave)));
+              espera = ESPERA_MS;
+              document.dispatchEvent(new CustomEvent('resultados-enviados', { detail: data }));
+          })
+          .catch(error => {
+              console.error('Error al enviar resultados:', error);
+              espera = Math.min(espera * 2, ESPERA_MAX_MS);
+          })
+          .finally(() => {
+              enviando = false;
+              if (leerCola().length > 0) {
+                  programar();
+              }
+          });
+    }
+
+    // `extra` lleva datos propios del juego (p. ej. las jugadas del Tic-Tac-Toe).
+    window.encolarResultado = function (juego, resultado, dificultad, duracionMs, extra) {
+        const cola = leerCola();
+        cola.push(Object.assign({}, extra, {
+            clave: nuevaClave(),
+            juego: juego,
+            resultado: resultado,
+            dificultad: dificultad,
+            duracion_ms: duracionMs
+        }));
+        guardarCola(cola);
+        programar();
+    };
+
+    // La cola sin estudiante de versiones anteriores no se sabe de quién es.
+    localStorage.removeItem('resultados_pendientes');
+    window.addEventListener('pagehide', enviar);
+    // Reintenta lo que haya quedado pendiente de visitas anteriores.
+    programar();
+})();
@@ -0,0 +1,121 @@
+import random
+from array import array
+
+# Motor de Tic-Tac-Toe.
+#
+# Un tablero se codifica como entero en base 3 (casilla i -> dígito i; 0 vacía,
+# 1 = X, 2 = O), así que cabe en un índice de 0 a 3^9 - 1. Al importar el
+# módulo se recorren por negamax las ~5.5k posiciones alcanzables (empieza X)
+# y se guardan en dos arrays planos indexados por ese entero:
+#   VALORES[t]  valor para el jugador al que le toca (>0 gana, <0 pierde, 0 tablas;
+#               cuanto mayor, antes gana; cuanto menor, antes pierde)
+#   MEJORES[t]  máscara de bits con las casillas que consiguen ese valor
+# Responder un movimiento es una consulta a la tabla: O(1).
+
+VACIA, X, O = 0, 1, 2
+SIMBOLOS = {VACIA: None, X: 'X', O: 'O'}
+POTENCIAS = tuple(3 ** i for i in range(9))
+LINEAS = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
+TAMANO_TABLA = 3 ** 9
+# Probabilidad de jugar al azar en cada dificultad (el resto, jugada óptima);
+# mismos valores que tenía el bot en el navegador.
+AZAR_POR_DIFICULTAD = {'facil': 1.0, 'normal': 0.7, 'dificil': 0.0}
+
+SIN_CALCULAR = -128
+VALORES = array('b', [SIN_CALCULAR]) * TAMANO_TABLA
+MEJORES = array('H', [0]) * TAMANO_TABLA
+
+
+def casilla(tablero, i):
+    return tablero // POTENCIAS[i] % 3
+
+
+def casillas(tablero):
+    """Lista de 9 valores 'X', 'O' o None."""
+    return [SIMBOLOS[casilla(tablero, i)] for i in range(9)]
+
+
+def piezas(tablero):
+    return sum(1 for i in range(9) if casilla(tablero, i) != VACIA)
+
+
+def turno(tablero):
+    return X if piezas(tablero) % 2 == 0 else O
+
+
+def ganador(tablero):
+    """'X', 'O', 'Empate' o None si la partida sigue."""
+    for a, b, c in LINEAS:
+        ficha = casilla(tablero, a)
+        if ficha != VACIA and ficha == casilla(tablero, b) == casilla(tablero, c):
+            return SIMBOLOS[ficha]
+    if piezas(tablero) == 9:
+        return 'Empate'
+    return None
+
+
+def libres(tablero):
+    return [i for i in range(9) if casilla(tablero, i) == VACIA]
+
+
+def es_legal(tablero, i):
+    return isinstance(i, int) and not isinstance(i, bool) and 0 <= i < 9 and casilla(tablero, i) == VACIA
+
+
+def jugar(tablero, i):
+    return tablero + turno(tablero) * POTENCIAS[i]
+
+
+def _resolver(tablero):
+    if VALORES[tablero] != SIN_CALCULAR:
+        return VALORES[tablero]
+    resultado = ganador(tablero)
+    if resultado is not None:
+        # Si la partida terminó, el último en mover ganó (o hubo tablas):
+        # para el jugador al que "le tocaría" es una derrota, más leve cuanto más tarde.
+        valor = 0 if resultado == 'Empate' else piezas(tablero) - 10
+        VALORES[tablero] = valor
+        return valor
+
+    mejor, mascara = None, 0
+    for i in libres(tablero):
+        valor = -_resolver(jugar(tablero, i))
+        if mejor is None or valor > mejor:
+            mejor, mascara = valor, 1 << i
+        elif valor == mejor:
+            mascara |= 1 << i
+    VALORES[tablero] = mejor
+    MEJORES[tablero] = mascara
+    return mejor
+
+
+_resolver(0)
+POSICIONES = sum(1 for valor in VALORES if valor != SIN_CALCULAR)
+
+
+def mejores_movimientos(tablero):
+    mascara = MEJORES[tablero]
+    return [i for i in range(9) if mascara >> i & 1]
+
+
+def movimiento_bot(tablero, dificultad, azar=random):
+    """Casilla que juega el bot en `tablero` (que no debe estar terminado)."""
+    if azar.random() < AZAR_POR_DIFICULTAD.get(dificultad, AZAR_POR_DIFICULTAD['normal']):
+        return azar.choice(libres(tablero))
+    return azar.choice(mejores_movimientos(tablero))
+
+
+def reproducir(movimientos):
+    """Valida una partida completa (lista de casillas, empieza X).
+
+    Devuelve el ganador ('X', 'O' o 'Empate') o None si la secuencia no es una
+    partida legal y terminada.
+    """
+    if not isinstance(movimientos, list) or len(movimientos) > 9:
+        return None
+    tablero = 0
+    for i in movimientos:
+        if ganador(tablero) is not None or not es_legal(tablero, i):
+            return None
+        tablero = jugar(tablero, i)
+    return ganador(tablero)